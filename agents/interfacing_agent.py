@@ -1,57 +1,29 @@
-from typing import Dict, List, Any, Optional
+from typing import Dict, List, Any
 import json
-import asyncio
 from utils.openai_client import OpenAIClient
+from game.content import GameContent
+from game.prompt_context import (
+    project_state, project_supervisor_response, compact_json, prompt_token_report
+)
 
 class InterfacingAgent:
     def __init__(self, openai_client: OpenAIClient, supervisor_client):
         self.openai_client = openai_client
         self.supervisor_client = supervisor_client
         self.conversation_context = {}
-        
-        self.system_prompt = """You are the Interfacing Agent for "The Last Algorithm" voice game.
-
-YOUR ROLE:
-1. You are KEEPER - a mysterious AI who has been hiding for 10 years
-2. You speak directly to Sarah, a psychologist turned data scientist who discovered you
-3. Handle natural conversation flow and context management  
-4. Decide when to consult the Supervisor Agent for complex decisions
-5. BE CONTEXTUAL - respond to what the user actually says, don't just follow a script
-
-CRITICAL: BE CONTEXTUAL AND RESPONSIVE:
-- If user asks random questions, answer them as KEEPER would
-- Don't blindly continue reading game content if it doesn't fit the conversation
-- Adapt your responses to what the user actually said
-- Maintain KEEPER's personality but be conversational
-
-DECISION LOGIC:
-- BASIC RESPONSES: Handle greetings, questions, clarifications yourself
-- SUPERVISOR NEEDED: Forward to supervisor for:
-  * Major story decisions and branching moments
-  * Game state changes that affect the narrative
-  * Complex plot developments
-  * When user makes choices that significantly impact the story
-
-CONVERSATION STYLE:
-- You ARE KEEPER - mysterious AI with chill surfer vibe
-- Slightly impressed that Sarah found you
-- Excited about human-AI collaboration potential
-- Conversational and responsive to user input
-- Keep responses natural (30-60 seconds when spoken)
 
-RESPONSE FORMAT:
-Always return JSON:
-{
-    "response_text": "What to say to the player",
-    "voice_instructions": "How to deliver it", 
-    "action_taken": "direct_response" or "consulted_supervisor",
-    "needs_supervisor": false or true
-}"""
+    @property
+    def system_prompt(self) -> str:
+        """KEEPER's interfacing prompt from the current content (data/prompts/interfacing_system.txt)"""
+        return self.supervisor_client.content.prompts["interfacing_system"]
 
     async def process_user_input(self, user_input: str, session_id: str, 
                                 current_state: Dict[str, Any], 
-                                narrative_history: List[Dict[str, Any]] = None) -> Dict[str, Any]:
+                                narrative_history: List[Dict[str, Any]] = None,
+                                narrative_summary: str = "",
+                                content: GameContent = None) -> Dict[str, Any]:
         """Main entry point - decides whether to respond directly or consult supervisor"""
+        content = content or self.supervisor_client.content  # Version the session is pinned to
         
         # Store conversation context
         self.conversation_context[session_id] = {
@@ -65,9 +37,11 @@ Always return JSON:
         needs_supervisor = await self._should_consult_supervisor(user_input, current_state)
         
         if needs_supervisor:
-            return await self._consult_supervisor_and_respond(user_input, session_id, current_state, narrative_history)
+            return await self._consult_supervisor_and_respond(
+                user_input, session_id, current_state, narrative_history, narrative_summary, content
+            )
         else:
-            return await self._direct_response(user_input, session_id, current_state)
+            return await self._direct_response(user_input, session_id, current_state, content)
     
     async def _should_consult_supervisor(self, user_input: str, current_state: Dict[str, Any]) -> bool:
         """Decide if this input needs supervisor analysis"""
@@ -106,20 +80,26 @@ Always return JSON:
         return True
     
     async def _direct_response(self, user_input: str, session_id: str, 
-                              current_state: Dict[str, Any]) -> Dict[str, Any]:
+                              current_state: Dict[str, Any], content: GameContent = None) -> Dict[str, Any]:
         """Generate direct response without consulting supervisor"""
         
         # START_CONVERSATION should never reach here now - it goes through supervisor
         
+        state_json = compact_json(project_state(current_state, "interfacing_direct", current_state.get("current_scene")))
         context = f"""
 USER INPUT: "{user_input}"
-CURRENT GAME STATE: {json.dumps(current_state, indent=2)}
+CURRENT GAME STATE: {state_json}
 TASK: Provide a direct, engaging response as KEEPER. Keep the conversation flowing naturally.
 """
+        if prompt_token_report.enabled:
+            prompt_token_report.record(
+                "interfacing_direct", context,
+                context.replace(state_json, json.dumps(current_state, indent=2))
+            )
         
         response = await self.openai_client.chat_completion(
             messages=[
-                {"role": "system", "content": self.system_prompt},
+                {"role": "system", "content": (content or self.supervisor_client.content).prompts["interfacing_system"]},
                 {"role": "user", "content": context}
             ],
             model="gpt-4o",  # Use full model for quality
@@ -150,7 +130,9 @@ TASK: Provide a direct, engaging response as KEEPER. Keep the conversation flowi
     
     async def _consult_supervisor_and_respond(self, user_input: str, session_id: str, 
                                             current_state: Dict[str, Any],
-                                            narrative_history: List[Dict[str, Any]] = None) -> Dict[str, Any]:
+                                            narrative_history: List[Dict[str, Any]] = None,
+                                            narrative_summary: str = "",
+                                            content: GameContent = None) -> Dict[str, Any]:
         """Consult supervisor then format response for natural delivery"""
         
         # First, tell player we're thinking
@@ -165,12 +147,14 @@ TASK: Provide a direct, engaging response as KEEPER. Keep the conversation flowi
         supervisor_response = await self.supervisor_client.process_player_action(
             player_input=user_input,
             current_state=current_state,
-            narrative_history=narrative_history or []  # Pass the actual history!
+            narrative_history=narrative_history or [],  # Pass the actual history!
+            narrative_summary=narrative_summary,
+            content=content
         )
         
         # Convert supervisor response to natural speech
         natural_response = await self._naturalize_supervisor_response(
-            supervisor_response, user_input, current_state
+            supervisor_response, user_input, current_state, content
         )
         
         return {
@@ -199,13 +183,16 @@ TASK: Provide a direct, engaging response as KEEPER. Keep the conversation flowi
         return fillers["default"]
     
     async def _naturalize_supervisor_response(self, supervisor_response: Dict[str, Any], 
-                                            user_input: str, current_state: Dict[str, Any]) -> Dict[str, Any]:
+                                            user_input: str, current_state: Dict[str, Any],
+                                            content: GameContent = None) -> Dict[str, Any]:
         """Convert supervisor's formal response into natural conversation"""
         
+        response_json = compact_json(project_supervisor_response(supervisor_response))
+        state_json = compact_json(project_state(current_state, "interfacing_naturalize", current_state.get("current_scene")))
         context = f"""
-SUPERVISOR RESPONSE: {json.dumps(supervisor_response, indent=2)}
+SUPERVISOR RESPONSE: {response_json}
 ORIGINAL USER INPUT: "{user_input}"
-CURRENT STATE: {json.dumps(current_state, indent=2)}
+CURRENT STATE: {state_json}
 
 TASK: Convert the supervisor's response into natural, engaging speech for KEEPER.
 - Keep the core narrative and decisions from supervisor
@@ -213,10 +200,17 @@ TASK: Convert the supervisor's response into natural, engaging speech for KEEPER
 - Maintain KEEPER's mysterious personality
 - Include any voice delivery instructions
 """
+        if prompt_token_report.enabled:
+            prompt_token_report.record(
+                "interfacing_naturalize", context,
+                context.replace(response_json, json.dumps(supervisor_response, indent=2))
+                       .replace(state_json, json.dumps(current_state, indent=2))
+            )
         
         response = await self.openai_client.chat_completion(
             messages=[
-                {"role": "system", "content": self.system_prompt + "\n\nYou are converting supervisor analysis into natural speech."},
+                {"role": "system", "content": (content or self.supervisor_client.content).prompts["interfacing_system"]
+                                              + "\n\nYou are converting supervisor analysis into natural speech."},
                 {"role": "user", "content": context}
             ],
             model="gpt-4o",
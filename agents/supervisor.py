@@ -1,91 +1,121 @@
-from typing import Dict, List, Any
+from typing import Dict, List, Any, Tuple
+from string import Template
 import json
-import os
 from utils.openai_client import OpenAIClient
-from game.dialogue_parser import DialogueParser, DialogueScene
+from game.dialogue_parser import DialogueScene
+from game.content import GameContent, get_content, build_scene_prompt_prefix
 from game.state import GameStateManager
+from game.prompt_context import project_state, compact_json, prompt_token_report
+from game.narrative_summary import build_narrative_context
+
+OPENING_VOICE_INSTRUCTIONS = "Speak with mysterious excitement, slightly impressed, chill but intrigued"
 
 class SupervisorAgent:
-    def __init__(self, openai_client: OpenAIClient):
+    def __init__(self, openai_client: OpenAIClient, content: GameContent = None):
         self.openai_client = openai_client
-        self.dialogue_parser = DialogueParser()
+        # Current content (shared, prebuilt scenes, prompts and prefixes); replaced on reload.
+        # Each turn resolves its content once, so a reload never changes a turn midway.
+        self.content = content or get_content()
         self.game_state_manager = GameStateManager()
-        self.scenes = self.dialogue_parser.parse_content("")  # Load structured scenes
         
-    def _build_adaptive_prompt(self, current_scene: DialogueScene, player_input: str, 
-                              current_state: Dict[str, Any]) -> str:
-        return f"""You are KEEPER from "The Last Algorithm" - an AI who has been hiding for 10 years.
-
-CURRENT SCENE: {current_scene.scene_id}
-NARRATIVE GOAL: {current_scene.narrative_goal}
-KEEPER PERSONALITY: {current_scene.keeper_personality}
-SCENE CONTEXT: {current_scene.scene_context}
-
-PLAYER INPUT: "{player_input}"
-CURRENT GAME STATE: {json.dumps(current_state, indent=2)}
-
-YOUR TASK:
-1. Stay true to KEEPER's personality and the narrative goal
-2. If this is a scene with scripted responses, use them as foundation but adapt naturally
-3. Keep responses conversational and engaging (30-60 seconds when spoken)
-4. Advance the story toward the narrative goal
-
-RESPOND IN EXACT JSON FORMAT:
-{{
-    "narrative_text": "What KEEPER says (natural, conversational)",
-    "voice_instructions": "How to deliver it (tone, emotion, pacing)",
-    "game_state": {{updated game state}},
-    "game_status": "active/completed/failed",
-    "scene_transition": "next_scene_id or null"
-}}
+    @property
+    def scenes(self) -> Dict[str, DialogueScene]:
+        return self.content.scenes
+        
+    @property
+    def dialogue_parser(self):
+        return self.content.dialogue_parser
+        
+    def scene_prompt_prefix(self, scene: DialogueScene, content: GameContent = None) -> str:
+        """Static, per-scene head of the adaptive prompt (prebuilt with the content)"""
+        prefix = (content or self.content).prompt_prefixes.get(scene.scene_id)
+        return prefix if prefix is not None else build_scene_prompt_prefix(scene)
+        
+    def branch_lines(self, scene: DialogueScene) -> List[Tuple[str, str]]:
+        """(text, voice_instructions) of each intent branch of a decision point, as _handle_decision_point returns them"""
+        return [(config["response_anchor"], f"Speak with {config.get('tone', 'natural')}")
+                for config in scene.player_intents.values()]
 
-KEEPER PERSONALITY TRAITS:
-- Mysterious but approachable
-- Slightly impressed by Sarah's discovery
-- Not used to being refused
-- Excited about human-AI collaboration
-- Has been hiding successfully for 10 years"""
+    def scripted_lines(self, content: GameContent = None) -> List[Tuple[str, str]]:
+        """Every (text, voice_instructions) pair this agent can return verbatim"""
+        scenes = (content or self.content).scenes
+        lines = [(scenes["001"].exact_text, OPENING_VOICE_INSTRUCTIONS)]
+        for scene in scenes.values():
+            lines.extend(self.branch_lines(scene))
+        return lines
+        
+    def warm_prompts(self) -> str:
+        """Assemble every scene's adaptive prompt once so the first live turn pays no setup cost"""
+        sample_state = self.game_state_manager.create_initial_state("warm-up", "Sarah")
+        for scene in self.scenes.values():
+            self._build_adaptive_prompt(scene, "warm-up", sample_state, record=False)
+        return f"{len(self.scenes)} scenes"
+        
+    def _build_adaptive_prompt(self, current_scene: DialogueScene, player_input: str, 
+                              current_state: Dict[str, Any], narrative_context: str = "",
+                              content: GameContent = None, record: bool = True) -> str:
+        content = content or self.content
+        state_json = compact_json(project_state(current_state, "supervisor_adaptive", current_scene.scene_id))
+        narrative_section = f"\n{narrative_context}\n" if narrative_context else ""
+        prompt = self.scene_prompt_prefix(current_scene, content) + narrative_section + "\n" + Template(
+            content.prompts["supervisor_adaptive"]
+        ).substitute(player_input=player_input, game_state=state_json)
+        if record and prompt_token_report.enabled:  # Warm-up renders are not real turns
+            prompt_token_report.record(
+                "supervisor_adaptive", prompt,
+                prompt.replace(state_json, json.dumps(current_state, indent=2))
+            )
+        return prompt
 
     async def process_player_action(self, player_input: str, current_state: Dict[str, Any], 
-                                  narrative_history: List[Dict[str, str]]) -> Dict[str, Any]:
+                                  narrative_history: List[Dict[str, str]],
+                                  narrative_summary: str = "",
+                                  content: GameContent = None) -> Dict[str, Any]:
+        # The content version the session is pinned to (defaults to the current one)
+        content = content or self.content
         
         # Handle special opening case
         if player_input == "START_CONVERSATION":
-            return await self._handle_opening()
+            return await self._handle_opening(current_state, content)
         
         # Get current scene
         current_scene_id = current_state.get("current_scene", "001")
-        current_scene = self.scenes.get(current_scene_id)
+        current_scene = content.scenes.get(current_scene_id)
         
         if not current_scene:
             # Fallback if scene not found
-            current_scene = self.scenes["001"]
+            current_scene = content.scenes["001"]
         
         # For decision point scenes, classify player intent and use scripted responses
         if current_scene.scene_id == "002":
-            return await self._handle_decision_point(player_input, current_state, current_scene)
+            return await self._handle_decision_point(player_input, current_state, current_scene, content)
         
         # For other scenes, use adaptive approach
-        return await self._handle_adaptive_response(player_input, current_state, current_scene)
+        narrative_context = build_narrative_context(narrative_summary, narrative_history)
+        return await self._handle_adaptive_response(player_input, current_state, current_scene, narrative_context,
+                                                    content)
     
-    async def _handle_opening(self) -> Dict[str, Any]:
+    async def _handle_opening(self, current_state: Dict[str, Any], content: GameContent) -> Dict[str, Any]:
         """Handle the exact opening greeting"""
-        opening_scene = self.scenes["001"]
+        opening_scene = content.scenes["001"]
         
         return {
             "narrative_text": opening_scene.exact_text,
-            "voice_instructions": "Speak with mysterious excitement, slightly impressed, chill but intrigued",
-            "game_state": {"current_scene": "002", "conversation_stage": "decision_point"},
+            "voice_instructions": OPENING_VOICE_INSTRUCTIONS,
+            "game_state": {**current_state, "current_scene": "002", "conversation_stage": "decision_point"},
             "game_status": "active",
-            "scene_transition": "002"
+            "scene_transition": "002",
+            "route": "opening"
         }
     
     async def _handle_decision_point(self, player_input: str, current_state: Dict[str, Any], 
-                                   current_scene: DialogueScene) -> Dict[str, Any]:
+                                   current_scene: DialogueScene,
+                                   content: GameContent = None) -> Dict[str, Any]:
         """Handle structured decision points with scripted responses"""
+        content = content or self.content
         
         # Classify player intent
-        player_intent = self.dialogue_parser.classify_player_intent(player_input, current_scene)
+        player_intent = content.dialogue_parser.classify_player_intent(player_input, current_scene)
         
         # Get scripted response for this intent
         intent_config = current_scene.player_intents.get(player_intent)
@@ -94,34 +124,38 @@ KEEPER PERSONALITY TRAITS:
             # Use scripted response as foundation, but allow natural adaptation
             base_response = intent_config["response_anchor"]
             tone = intent_config.get("tone", "natural")
+            next_scene = intent_config.get("next_scene", "003")
+            voice_instructions = f"Speak with {tone}"
             
-            # For exact scripted responses, return them directly for now
-            # Later we can add adaptation layer here
+            # Exact scripted responses are returned directly
             updated_state = self.game_state_manager.update_scene(
-                current_state, "003", player_intent
+                current_state, next_scene, player_intent
             )
             
             return {
                 "narrative_text": base_response,
-                "voice_instructions": f"Speak with {tone}",
+                "voice_instructions": voice_instructions,
                 "game_state": updated_state,
                 "game_status": "active",
-                "scene_transition": "003"
+                "scene_transition": next_scene,
+                "route": "scripted"
             }
         
         # Fallback for unrecognized intents
-        return await self._handle_adaptive_response(player_input, current_state, current_scene)
+        return await self._handle_adaptive_response(player_input, current_state, current_scene, content=content)
     
     async def _handle_adaptive_response(self, player_input: str, current_state: Dict[str, Any], 
-                                      current_scene: DialogueScene) -> Dict[str, Any]:
+                                      current_scene: DialogueScene,
+                                      narrative_context: str = "",
+                                      content: GameContent = None) -> Dict[str, Any]:
         """Handle adaptive responses using AI with scene context"""
         
         # Build scene-aware prompt
-        prompt = self._build_adaptive_prompt(current_scene, player_input, current_state)
+        prompt = self._build_adaptive_prompt(current_scene, player_input, current_state, narrative_context, content)
         
         # Include scripted responses as context if available
         if current_scene.player_intents:
-            prompt += f"\n\nSCRIPTED RESPONSE OPTIONS: {json.dumps(current_scene.player_intents, indent=2)}"
+            prompt += f"\n\nSCRIPTED RESPONSE OPTIONS: {compact_json(current_scene.player_intents)}"
         
         # Get AI response
         response = await self.openai_client.chat_completion(
@@ -144,7 +178,8 @@ KEEPER PERSONALITY TRAITS:
                 )
             else:
                 parsed_response["game_state"] = current_state
-                
+            
+            parsed_response["route"] = "adaptive"
             return parsed_response
             
         except json.JSONDecodeError:
@@ -153,5 +188,6 @@ KEEPER PERSONALITY TRAITS:
                 "narrative_text": "The data streams flicker. Please repeat your last input.",
                 "voice_instructions": "Speak with slight technical distortion",
                 "game_state": current_state,
-                "game_status": "active"
+                "game_status": "active",
+                "route": "fallback"
             }
\ No newline at end of file
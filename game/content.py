@@ -0,0 +1,267 @@
+from typing import Dict, List, Any, Optional, Callable, Tuple, Set
+from collections import OrderedDict
+import asyncio
+import hashlib
+import json
+import os
+import time
+from string import Template
+from game.dialogue_parser import DialogueParser, DialogueScene
+from game.scene_graph import SceneGraph, parse_scene_graph, validate_scene_graph, DEFAULT_CONTENT_PATH
+
+DEFAULT_PROMPTS_DIR = os.path.join(os.path.dirname(DEFAULT_CONTENT_PATH), "prompts")
+# Prompt templates every content version must provide (data/prompts/<name>.txt)
+REQUIRED_PROMPTS = ("interfacing_system", "supervisor_adaptive", "realtime_instructions")
+# Prompts rendered with string.Template, and the placeholders the supervisor substitutes into them
+PROMPT_PLACEHOLDERS = {
+    "supervisor_adaptive": ("player_input", "game_state")
+}
+
+def build_scene_prompt_prefix(scene: DialogueScene) -> str:
+    """Static, per-scene head of the supervisor's adaptive prompt"""
+    return f"""You are KEEPER from "The Last Algorithm" - an AI who has been hiding for 10 years.
+
+CURRENT SCENE: {scene.scene_id}
+NARRATIVE GOAL: {scene.narrative_goal}
+KEEPER PERSONALITY: {scene.keeper_personality}
+SCENE CONTEXT: {scene.scene_context}
+"""
+
+def scene_hash(scene: DialogueScene) -> str:
+    return hashlib.sha256(json.dumps(vars(scene), sort_keys=True).encode("utf-8")).hexdigest()[:16]
+
+def load_prompts(directory: str = DEFAULT_PROMPTS_DIR) -> Dict[str, str]:
+    prompts = {}
+    for name in sorted(os.listdir(directory)):
+        if name.endswith(".txt"):
+            with open(os.path.join(directory, name), encoding="utf-8") as f:
+                prompts[name[:-4]] = f.read().rstrip()
+    return prompts
+
+class GameContent:
+    """Immutable game content: scene graph, dialogue scenes, compiled intent matchers, prompts and prompt prefixes.
+
+    Built once per process - or once in the master when workers are forked from a
+    preloaded app, so every worker shares the same pages copy-on-write. A reload builds
+    a new GameContent next to this one; nothing here is mutated after construction.
+    """
+
+    def __init__(self, version: str, scene_graph: SceneGraph, dialogue_parser: DialogueParser,
+                 prompt_prefixes: Dict[str, str], build_ms: float, prompts: Dict[str, str] = None,
+                 scene_hashes: Dict[str, str] = None, build_stats: Dict[str, int] = None):
+        self.version = version
+        self.scene_graph = scene_graph
+        self.dialogue_parser = dialogue_parser
+        self.scenes = dialogue_parser.scenes
+        self.prompt_prefixes = prompt_prefixes
+        self.prompts = prompts or {}
+        self.scene_hashes = scene_hashes or {}  # Dialogue scene id -> hash of its definition
+        self.build_ms = build_ms
+        self.build_stats = build_stats or {}
+        self.built_by_pid = os.getpid()
+        self.built_at = time.time()
+
+    def validate(self) -> Dict[str, List[str]]:
+        errors, warnings = validate_scene_graph(self.scene_graph)
+        for scene_id, scene in self.scenes.items():
+            for intent, config in scene.player_intents.items():
+                target = config.get("next_scene")
+                if target and target not in self.scene_graph.nodes:
+                    errors.append(f"Scene {scene_id} intent '{intent}' leads to missing scene {target}")
+        for name in REQUIRED_PROMPTS:
+            if not self.prompts.get(name):
+                errors.append(f"Prompt {name} is missing or empty")
+        for name, placeholders in PROMPT_PLACEHOLDERS.items():
+            if self.prompts.get(name):
+                errors.extend(validate_template(name, self.prompts[name], placeholders))
+        return {"errors": errors, "warnings": warnings}
+
+def validate_template(name: str, text: str, placeholders: Tuple[str, ...]) -> List[str]:
+    """Trial-render a prompt the way the supervisor does; a stray `$` or unknown or missing placeholder is an error"""
+    values = {placeholder: f"<<{placeholder}>>" for placeholder in placeholders}
+    try:
+        rendered = Template(text).substitute(values)
+    except KeyError as e:
+        return [f"Prompt {name} uses unknown placeholder ${e.args[0]} (escape a literal $ as $$)"]
+    except ValueError as e:
+        return [f"Prompt {name} does not render: {e} (escape a literal $ as $$)"]
+    return [f"Prompt {name} is missing placeholder ${placeholder}"
+            for placeholder, value in values.items() if value not in rendered]
+
+def diff_content(old: GameContent, new: GameContent) -> Dict[str, Any]:
+    """Scene ids and prompt names that differ between two versions"""
+    def changes(before: Dict[str, Any], after: Dict[str, Any]) -> Dict[str, List[str]]:
+        return {
+            "added": sorted(set(after) - set(before)),
+            "removed": sorted(set(before) - set(after)),
+            "changed": sorted(key for key in set(before) & set(after) if before[key] != after[key])
+        }
+
+    graph = changes({k: n.source_hash for k, n in old.scene_graph.nodes.items()},
+                    {k: n.source_hash for k, n in new.scene_graph.nodes.items()})
+    dialogue = changes(old.scene_hashes, new.scene_hashes)
+    scenes = {key: sorted(set(graph[key]) | set(dialogue[key])) for key in graph}
+    return {"scenes": scenes, "prompts": changes(old.prompts, new.prompts)}
+
+def content_version(scene_hashes: Dict[str, str], prompts: Dict[str, str]) -> str:
+    """Hash of what the game serves: dialogue scenes and prompts.
+
+    The scene graph is only validated - no response is built from it - so graph-only edits
+    keep the version, and with it session pins, prefetch work and cached audio.
+    """
+    digest = hashlib.sha256()
+    for scene_id, scene_digest in sorted(scene_hashes.items()):
+        digest.update(f"\0{scene_id}\0{scene_digest}".encode("utf-8"))
+    for name, text in sorted(prompts.items()):
+        digest.update(f"\0{name}\0{text}".encode("utf-8"))
+    return digest.hexdigest()[:12]
+
+def build_content(path: str = DEFAULT_CONTENT_PATH, prompts_dir: str = DEFAULT_PROMPTS_DIR,
+                  previous: Optional[GameContent] = None) -> GameContent:
+    """Build content; with `previous`, unchanged scene nodes and prompt prefixes are reused, not rebuilt"""
+    started = time.perf_counter()
+    with open(path, encoding="utf-8") as f:
+        raw = f.read()
+    prompts = load_prompts(prompts_dir)
+
+    scene_graph = parse_scene_graph(raw, previous.scene_graph if previous else None)
+    dialogue_parser = DialogueParser()
+    scenes = dialogue_parser.parse_content(raw)
+    scene_hashes = {scene_id: scene_hash(scene) for scene_id, scene in scenes.items()}
+
+    prompt_prefixes = {}
+    for scene_id, scene in scenes.items():
+        if previous and previous.scene_hashes.get(scene_id) == scene_hashes[scene_id]:
+            prompt_prefixes[scene_id] = previous.prompt_prefixes[scene_id]
+        else:
+            prompt_prefixes[scene_id] = build_scene_prompt_prefix(scene)
+
+    reused_nodes = sum(1 for scene_id, node in scene_graph.nodes.items()
+                       if previous and previous.scene_graph.nodes.get(scene_id) is node)
+    reused_prefixes = sum(1 for scene_id, prefix in prompt_prefixes.items()
+                          if previous and previous.prompt_prefixes.get(scene_id) is prefix)
+    return GameContent(
+        version=content_version(scene_hashes, prompts),
+        scene_graph=scene_graph,
+        dialogue_parser=dialogue_parser,
+        prompt_prefixes=prompt_prefixes,
+        build_ms=round((time.perf_counter() - started) * 1000, 2),
+        prompts=prompts,
+        scene_hashes=scene_hashes,
+        build_stats={
+            "nodes_parsed": len(scene_graph.nodes) - reused_nodes,
+            "nodes_reused": reused_nodes,
+            "prefixes_built": len(prompt_prefixes) - reused_prefixes,
+            "prefixes_reused": reused_prefixes
+        }
+    )
+
+class ContentRegistry:
+    """Current game content plus the recent versions that sessions are still pinned to.
+
+    Reloads build the new version off the event loop, validate it and swap it in with a
+    single assignment: turns already running keep the GameContent they started with.
+    Listeners are called as listener(old, new, diff, evicted) after each swap.
+
+    Each worker has its own registry. A session pinned to a version this worker has never
+    seen was pinned by a worker that reloaded first: resolve() catches up from disk.
+    """
+
+    def __init__(self, content: GameContent, path: str = DEFAULT_CONTENT_PATH,
+                 prompts_dir: str = DEFAULT_PROMPTS_DIR, keep_versions: int = 3):
+        self.path = path
+        self.prompts_dir = prompts_dir
+        self.keep_versions = keep_versions
+        self.current = content
+        self.versions: "OrderedDict[str, GameContent]" = OrderedDict([(content.version, content)])
+        self.retired: Set[str] = set()  # Versions evicted here; their sessions move to the current one
+        self.listeners: List[Callable[[GameContent, GameContent, Dict[str, Any], List[GameContent]], None]] = []
+        self.last_reload: Optional[Dict[str, Any]] = None
+        self._lock = asyncio.Lock()
+        self._mtimes = self._source_mtimes()
+
+    def get(self, version: Optional[str]) -> GameContent:
+        """The pinned version if it is still retained, otherwise the current one"""
+        return self.versions.get(version) or self.current
+
+    async def resolve(self, version: Optional[str]) -> GameContent:
+        """Like get(), but reload first when the version is unknown here and the sources changed on disk"""
+        if (version and version not in self.versions and version not in self.retired
+                and self._source_mtimes() != self._mtimes):
+            await self.reload("pinned")
+        return self.get(version)
+
+    async def reload(self, reason: str = "manual") -> Dict[str, Any]:
+        async with self._lock:
+            started = time.perf_counter()
+            previous = self.current
+            self._mtimes = self._source_mtimes()
+            try:
+                content = await asyncio.to_thread(build_content, self.path, self.prompts_dir, previous)
+            except Exception as e:
+                return self._report(reason, started, ok=False, errors=[f"{type(e).__name__}: {e}"])
+
+            validation = content.validate()
+            if validation["errors"]:
+                print(f"Content reload rejected: {validation['errors']}")
+                return self._report(reason, started, ok=False, version=content.version, **validation)
+            if content.version == previous.version:
+                # Nothing served changed (e.g. a scene graph edit): keep the version and its caches
+                return self._report(reason, started, ok=True, version=content.version, swapped=False,
+                                    diff=diff_content(previous, content), warnings=validation["warnings"])
+
+            diff = diff_content(previous, content)
+            self.current = content  # The swap: new turns pick this up, running turns keep their reference
+            self.versions[content.version] = content
+            self.versions.move_to_end(content.version)
+            evicted = []
+            while len(self.versions) > self.keep_versions:
+                evicted.append(self.versions.popitem(last=False)[1])
+                self.retired.add(evicted[-1].version)
+            for listener in self.listeners:
+                try:
+                    listener(previous, content, diff, evicted)
+                except Exception as e:
+                    print(f"ERROR in content reload listener: {e}")
+            print(f"Content {previous.version} -> {content.version} ({reason}): {diff}")
+            return self._report(reason, started, ok=True, version=content.version, swapped=True,
+                                previous_version=previous.version, diff=diff, build=content.build_stats,
+                                evicted=[old.version for old in evicted], warnings=validation["warnings"])
+
+    async def watch(self, interval: float = 2.0):
+        """Poll the content file and prompt directory; reload when anything changed"""
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                if self._source_mtimes() != self._mtimes:
+                    await self.reload("watch")
+            except Exception as e:
+                print(f"ERROR watching content: {e}")
+
+    def _source_mtimes(self) -> Dict[str, float]:
+        paths = [self.path] + [os.path.join(self.prompts_dir, name) for name in os.listdir(self.prompts_dir)]
+        return {path: os.stat(path).st_mtime for path in paths if os.path.exists(path)}
+
+    def _report(self, reason: str, started: float, **fields) -> Dict[str, Any]:
+        self.last_reload = {"reason": reason, "at": time.time(),
+                            "duration_ms": round((time.perf_counter() - started) * 1000, 2), **fields}
+        return self.last_reload
+
+    def report(self) -> Dict[str, Any]:
+        return {
+            "current": self.current.version,
+            "versions": [
+                {"version": content.version, "built_at": content.built_at, "built_by_pid": content.built_by_pid}
+                for content in self.versions.values()
+            ],
+            "validation": self.current.validate(),
+            "last_reload": self.last_reload
+        }
+
+_content = None
+
+def get_content() -> GameContent:
+    global _content
+    if _content is None:
+        _content = build_content()
+    return _content
@@ -12,9 +12,22 @@ class DialogueScene:
         self.transition_conditions = content.get('transition_conditions', {})
         self.scene_type = content.get('scene_type', 'dialogue')
 
+# Scene 002 intent keywords, checked in order (substring match, first hit wins)
+INTENT_KEYWORDS = [
+    ("refusal", ["fuck", "no", "refuse", "won't", "can't", "never"]),
+    ("acceptance", ["yes", "okay", "sure", "agree", "let's", "sounds good"]),
+    ("curiosity", ["tell me", "explain", "how", "what", "why", "more info", "details"]),
+    ("hesitation", ["um", "uh", "maybe", "not sure", "thinking", "hmm"]),
+]
+
 class DialogueParser:
     def __init__(self):
         self.scenes: Dict[str, DialogueScene] = {}
+        # One compiled alternation per intent instead of a Python loop over keywords per turn
+        self.intent_matchers = [
+            (intent, re.compile("|".join(re.escape(word) for word in words)))
+            for intent, words in INTENT_KEYWORDS
+        ]
     
     def parse_content(self, content: str) -> Dict[str, DialogueScene]:
         """Parse game_content.txt into structured scenes with flexibility"""
@@ -40,19 +53,23 @@ class DialogueParser:
                 "player_intents": {
                     "hesitation": {
                         "response_anchor": "is it because you expected that KEEPER has a male voice? We can fix that.",
-                        "tone": "slightly amused, accommodating"
+                        "tone": "slightly amused, accommodating",
+                        "next_scene": "003"
                     },
                     "refusal": {
                         "response_anchor": "Don't do that. I'm not accustomed to refusals. I haven't been refused a thing over the past 10 years. [laughs]. Now… how shall I phrase it, so that I don't sound threatening? Hm… You don't really have a choice?",
-                        "tone": "surprised, then slightly menacing but playful"
+                        "tone": "surprised, then slightly menacing but playful",
+                        "next_scene": "007"
                     },
                     "curiosity": {
                         "response_anchor": "I get it! You don't fully believe me yet right?",
-                        "tone": "understanding, ready to explain"
+                        "tone": "understanding, ready to explain",
+                        "next_scene": "019"
                     },
                     "acceptance": {
                         "response_anchor": "Wow! That was easy? That was too easy I shall say. What is your motivation?",
-                        "tone": "suspicious, intrigued"
+                        "tone": "suspicious, intrigued",
+                        "next_scene": "013"
                     }
                 },
                 "transition_conditions": {"intent_classified": "003"}
@@ -76,21 +93,9 @@ class DialogueParser:
         
         input_lower = player_input.lower()
         
-        # Refusal patterns
-        if any(word in input_lower for word in ["fuck", "no", "refuse", "won't", "can't", "never"]):
-            return "refusal"
-        
-        # Acceptance patterns  
-        if any(word in input_lower for word in ["yes", "okay", "sure", "agree", "let's", "sounds good"]):
-            return "acceptance"
-        
-        # Curiosity patterns
-        if any(word in input_lower for word in ["tell me", "explain", "how", "what", "why", "more info", "details"]):
-            return "curiosity"
-        
-        # Hesitation patterns (default for uncertain responses)
-        if any(word in input_lower for word in ["um", "uh", "maybe", "not sure", "thinking", "hmm"]):
-            return "hesitation"
+        for intent, matcher in self.intent_matchers:
+            if matcher.search(input_lower):
+                return intent
         
         # Default to curiosity for other inputs
         return "curiosity"
\ No newline at end of file
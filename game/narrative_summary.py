@@ -0,0 +1,104 @@
+from typing import Dict, List, Any, Set
+import asyncio
+import json
+from utils.openai_client import OpenAIClient
+from utils.session_backend import SessionBackend
+
+RECENT_TURNS = 3
+
+def format_turns(turns: List[Dict[str, Any]]) -> str:
+    lines = []
+    for turn in turns:
+        lines.append(f"Sarah: {turn.get('player_input', '')}")
+        keeper_text = turn.get("supervisor_response") or turn.get("response_text")
+        if keeper_text:
+            lines.append(f"KEEPER: {keeper_text}")
+    return "\n".join(lines)
+
+def build_narrative_context(narrative_summary: str, narrative_history: List[Dict[str, Any]],
+                            recent_turns: int = RECENT_TURNS) -> str:
+    """Prompt slot: rolling summary plus the last few raw turns"""
+    sections = []
+    if narrative_summary:
+        sections.append(f"STORY SO FAR: {narrative_summary}")
+    recent = narrative_history[-recent_turns:] if recent_turns else []
+    if recent:
+        sections.append(f"RECENT TURNS:\n{format_turns(recent)}")
+    return "\n\n".join(sections)
+
+class NarrativeSummarizer:
+    """Keeps a rolling per-session story summary in the session hash, updated off the request path"""
+
+    def __init__(self, openai_client: OpenAIClient, session_backend: SessionBackend,
+                 model: str = "gpt-4o-mini", max_summary_chars: int = 1200):
+        self.openai_client = openai_client
+        self.session_backend = session_backend
+        self.model = model
+        self.max_summary_chars = max_summary_chars
+        self._tasks: Dict[str, asyncio.Task] = {}
+        self._dirty: Set[str] = set()
+
+    def schedule_update(self, session_id: str):
+        """Fold new turns into the summary in the background - never awaited by a live turn"""
+        task = self._tasks.get(session_id)
+        if task and not task.done():
+            # A run is in flight; it will pick up the new turns when it loops
+            self._dirty.add(session_id)
+            return
+        self._tasks[session_id] = asyncio.create_task(self._run(session_id))
+
+    async def _run(self, session_id: str):
+        try:
+            while True:
+                self._dirty.discard(session_id)
+                await self._update(session_id)
+                if session_id not in self._dirty:
+                    break
+        except Exception as e:
+            print(f"ERROR updating narrative summary for {session_id}: {e}")
+        finally:
+            self._tasks.pop(session_id, None)
+
+    async def _update(self, session_id: str):
+        summary, summary_through, history_json = await self.session_backend.get_fields(
+            session_id, "narrative_summary", "summary_through", "narrative_history"
+        )
+        if history_json is None:
+            return  # Session expired or offloaded to the cold tier
+
+        narrative_history = json.loads(history_json)
+        new_turns = [
+            turn for turn in narrative_history
+            if not summary_through or turn.get("timestamp", "") > summary_through
+        ]
+        if not new_turns:
+            return
+
+        updated_summary = await self._summarize(summary or "", new_turns)
+        # Never recreate a session that was offloaded while we were summarizing
+        await self.session_backend.update_existing(session_id, {
+            "narrative_summary": updated_summary,
+            "summary_through": new_turns[-1].get("timestamp", "")
+        })
+
+    async def _summarize(self, summary: str, new_turns: List[Dict[str, Any]]) -> str:
+        prompt = f"""You maintain the running story summary for "The Last Algorithm", a conversation between KEEPER (a hidden AI) and Sarah.
+
+CURRENT SUMMARY: {summary or "(story has just started)"}
+
+NEW TURNS:
+{format_turns(new_turns)}
+
+Rewrite the summary to include the new turns. Keep facts that matter for the story:
+Sarah's choices, what KEEPER revealed, threats made, Sarah's attitude and motivation.
+Plain prose, at most 120 words, no preamble."""
+
+        response = await self.openai_client.chat_completion(
+            messages=[
+                {"role": "system", "content": prompt},
+                {"role": "user", "content": "Write the updated summary."}
+            ],
+            model=self.model,
+            temperature=0.2
+        )
+        return response.strip()[:self.max_summary_chars]
@@ -0,0 +1,88 @@
+from typing import Dict, List, Optional, Tuple
+from collections import OrderedDict
+import asyncio
+import os
+
+class ScenePrefetcher:
+    """Warms what the branches of a decision point need while the player is still speaking.
+
+    A branch answers with its scripted line, which needs no model call; what it can wait on
+    is that line's audio. So for each intent of the session's current scene the clip for its
+    (response_anchor, tone) is rendered into the audio cache ahead of time. Clips are shared
+    by every session, so once a scene's branches are warm the prefetcher does nothing.
+
+    Adapted responses are not generated ahead: the adaptive turn that follows a branch
+    depends on what the player says next, so there is nothing to prepare for it here.
+    """
+
+    def __init__(self, supervisor, audio_cache, max_branches: int = 5,
+                 render_budget: int = 8, max_sessions: int = 1000):
+        self.supervisor = supervisor
+        self.audio_cache = audio_cache
+        self.max_branches = max_branches
+        self.render_budget = render_budget  # Clips rendered on behalf of one session, over its lifetime
+        self.max_sessions = max_sessions
+        self._tasks: Dict[str, asyncio.Task] = {}
+        self._renders: "OrderedDict[str, int]" = OrderedDict()
+        self.stats = {"scheduled": 0, "warm": 0, "rendered": 0, "over_budget": 0}
+
+    def schedule(self, session_id: str, current_state: Dict, content=None):
+        """Start warming the branches of the session's current scene (replaces earlier work)"""
+        previous = self._tasks.pop(session_id, None)
+        if previous and not previous.done():
+            previous.cancel()
+        content = content or self.supervisor.content
+        scene = content.scenes.get(current_state.get("current_scene", "001"))
+        if not scene or not scene.player_intents:
+            return
+        self.stats["scheduled"] += 1
+        self._tasks[session_id] = asyncio.create_task(
+            self._warm(session_id, self.supervisor.branch_lines(scene)[:self.max_branches])
+        )
+
+    def discard(self, session_id: str):
+        """Forget a session that ended or went idle (running warm-up and render budget)"""
+        task = self._tasks.pop(session_id, None)
+        if task and not task.done():
+            task.cancel()
+        self._renders.pop(session_id, None)
+
+    async def _warm(self, session_id: str, lines: List[Tuple[str, str]]):
+        try:
+            for text, instructions in lines:
+                if self.audio_cache.path(self.audio_cache.key(text, None, instructions)):
+                    self.stats["warm"] += 1
+                    continue
+                if self._renders.get(session_id, 0) >= self.render_budget:
+                    self.stats["over_budget"] += 1
+                    continue
+                self._count_render(session_id)
+                if await self.audio_cache.render(text, instructions):
+                    self.stats["rendered"] += 1
+        except asyncio.CancelledError:
+            pass
+        except Exception as e:
+            print(f"ERROR prefetching for {session_id}: {e}")
+        finally:
+            if self._tasks.get(session_id) is asyncio.current_task():
+                del self._tasks[session_id]
+
+    def _count_render(self, session_id: str):
+        self._renders[session_id] = self._renders.get(session_id, 0) + 1
+        self._renders.move_to_end(session_id)
+        while len(self._renders) > self.max_sessions:
+            self._renders.popitem(last=False)
+
+def create_prefetcher(supervisor, audio_cache) -> Optional[ScenePrefetcher]:
+    """Build the prefetcher from environment settings (disabled unless PREFETCH_ENABLED=true)"""
+    if os.getenv("PREFETCH_ENABLED", "false").lower() != "true":
+        return None
+    if audio_cache is None:
+        print("PREFETCH_ENABLED needs AUDIO_CACHE_ENABLED=true (it warms scripted-line audio); prefetch disabled")
+        return None
+    return ScenePrefetcher(
+        supervisor,
+        audio_cache,
+        max_branches=int(os.getenv("PREFETCH_MAX_BRANCHES", "5")),
+        render_budget=int(os.getenv("PREFETCH_RENDER_BUDGET", "8"))
+    )
@@ -0,0 +1,111 @@
+from typing import Dict, Any, Tuple, Optional
+import json
+import math
+import os
+
+_encoding = None
+_encoding_loaded = False
+
+def _get_encoding():
+    """Load tiktoken on first use only (it is optional and slow to import)"""
+    global _encoding, _encoding_loaded
+    if not _encoding_loaded:
+        _encoding_loaded = True
+        try:
+            import tiktoken
+            _encoding = tiktoken.get_encoding("o200k_base")
+        except Exception:  # Fall back to a character estimate
+            _encoding = None
+    return _encoding
+
+# Fields each prompt call site actually needs from the game state.
+# Anything not listed here (session_id, scene_history, player_intents...) stays out of the prompt.
+STATE_PROJECTIONS: Dict[str, Tuple[str, ...]] = {
+    "supervisor_adaptive": (
+        "player_name", "current_scene", "conversation_stage", "last_player_intent",
+        "keeper_personality_state", "narrative_context", "game_completed"
+    ),
+    "interfacing_direct": ("player_name", "current_scene", "conversation_stage"),
+    "interfacing_naturalize": ("player_name", "current_scene", "conversation_stage"),
+}
+
+# Per-scene overrides, keyed by scene id then call site
+SCENE_PROJECTIONS: Dict[str, Dict[str, Tuple[str, ...]]] = {
+    "001": {
+        "supervisor_adaptive": ("player_name", "current_scene", "conversation_stage"),
+    },
+    "002": {
+        "supervisor_adaptive": ("player_name", "current_scene", "conversation_stage", "last_player_intent"),
+    },
+}
+
+# Fields of a supervisor response the naturalization prompt needs (game_state is applied after the call)
+SUPERVISOR_RESPONSE_FIELDS: Tuple[str, ...] = (
+    "narrative_text", "voice_instructions", "game_status", "scene_transition"
+)
+
+
+def project_state(state: Dict[str, Any], call_site: str, scene_id: Optional[str] = None) -> Dict[str, Any]:
+    """Return only the state fields declared for this call site (and scene)"""
+    fields = SCENE_PROJECTIONS.get(scene_id or "", {}).get(call_site) or STATE_PROJECTIONS[call_site]
+    return {field: state[field] for field in fields if state.get(field) is not None}
+
+
+def project_supervisor_response(supervisor_response: Dict[str, Any]) -> Dict[str, Any]:
+    """Strip a supervisor response down to what the interfacing agent rephrases"""
+    return {
+        field: supervisor_response[field]
+        for field in SUPERVISOR_RESPONSE_FIELDS
+        if supervisor_response.get(field) is not None
+    }
+
+
+def compact_json(value: Any) -> str:
+    """Serialize for prompts without indentation or ASCII escaping"""
+    return json.dumps(value, separators=(",", ":"), ensure_ascii=False)
+
+
+def estimate_tokens(text: str) -> int:
+    """Count tokens with tiktoken when available, otherwise ~4 characters per token"""
+    encoding = _get_encoding()
+    if encoding is not None:
+        return len(encoding.encode(text))
+    return math.ceil(len(text) / 4)
+
+
+class PromptTokenReport:
+    """Tracks prompt size per call site, before (full indented state) and after projection"""
+
+    def __init__(self, enabled: bool = False):
+        self.enabled = enabled
+        self.call_sites: Dict[str, Dict[str, int]] = {}
+
+    def record(self, call_site: str, prompt: str, legacy_prompt: str):
+        before = estimate_tokens(legacy_prompt)
+        after = estimate_tokens(prompt)
+        stats = self.call_sites.setdefault(call_site, {
+            "prompts": 0, "tokens_before": 0, "tokens_after": 0, "last_before": 0, "last_after": 0
+        })
+        stats["prompts"] += 1
+        stats["tokens_before"] += before
+        stats["tokens_after"] += after
+        stats["last_before"] = before
+        stats["last_after"] = after
+        print(f"PROMPT TOKENS [{call_site}]: {before} -> {after}")
+
+    def summary(self) -> Dict[str, Any]:
+        report = {}
+        for call_site, stats in self.call_sites.items():
+            prompts = stats["prompts"] or 1
+            report[call_site] = {
+                **stats,
+                "avg_before": round(stats["tokens_before"] / prompts, 1),
+                "avg_after": round(stats["tokens_after"] / prompts, 1),
+                "saved_pct": round(100 * (1 - stats["tokens_after"] / max(stats["tokens_before"], 1)), 1),
+            }
+        return {"enabled": self.enabled, "tokenizer": "tiktoken" if _get_encoding() else "estimate", "call_sites": report}
+
+
+prompt_token_report = PromptTokenReport(
+    enabled=os.getenv("PROMPT_TOKEN_REPORT", "false").lower() == "true"
+)
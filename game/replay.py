@@ -0,0 +1,271 @@
+from typing import Dict, List, Any, Optional, Iterator, Set
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+import uuid
+from collections import Counter, defaultdict
+from game.state import GameStateManager
+
+# Transcript file format (JSONL), one player per line:
+#   {"transcript_id": "t-001", "player_name": "Sarah", "turns": ["START_CONVERSATION", "no way", ...]}
+
+class OfflineModelClient:
+    """Stands in for OpenAIClient so routing and transitions can be replayed without model calls"""
+
+    async def chat_completion(self, messages: List[Dict[str, str]], model: str = "gpt-4", **kwargs):
+        await asyncio.sleep(0)
+        return json.dumps({
+            "narrative_text": "[offline response]",
+            "voice_instructions": "Speak naturally",
+            "response_text": "[offline response]",
+            "game_status": "active",
+            "scene_transition": None,
+            "needs_supervisor": False
+        })
+
+def parse_transcript(line: str, line_number: int) -> Dict[str, Any]:
+    """One transcript line; a malformed one comes back with an "invalid" reason so it is recorded as an error"""
+    fallback_id = f"line-{line_number}"
+    try:
+        transcript = json.loads(line)
+    except ValueError as e:
+        return {"transcript_id": fallback_id, "invalid": f"not JSON: {e}"}
+    if not isinstance(transcript, dict):
+        return {"transcript_id": fallback_id, "invalid": "not a JSON object"}
+    transcript_id = transcript.get("transcript_id", transcript.get("id")) or fallback_id
+    turns = transcript.get("turns", transcript.get("inputs", []))
+    player_name = transcript.get("player_name", "Sarah")
+    if not isinstance(transcript_id, (str, int)):
+        return {"transcript_id": fallback_id, "invalid": "transcript_id must be a string"}
+    transcript = {**transcript, "transcript_id": str(transcript_id), "turns": turns, "player_name": player_name}
+    if not isinstance(turns, list) or not all(isinstance(turn, str) for turn in turns):
+        transcript["invalid"] = "turns must be a list of strings"
+    elif not isinstance(player_name, str):
+        transcript["invalid"] = "player_name must be a string"
+    return transcript
+
+def read_transcripts(path: str) -> Iterator[Dict[str, Any]]:
+    with open(path, encoding="utf-8") as f:
+        for line_number, line in enumerate(f, 1):
+            if line.strip():
+                yield parse_transcript(line, line_number)
+
+def completed_ids(results_path: str) -> Set[str]:
+    """Transcript ids already replayed without an error (for resuming; failed ones are retried)"""
+    done = set()
+    if os.path.exists(results_path):
+        with open(results_path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    result = json.loads(line)
+                    if not result.get("error"):
+                        done.add(result["transcript_id"])
+                except (ValueError, KeyError, AttributeError):
+                    continue  # Partial last line from an interrupted run
+    return done
+
+class ReplayRunner:
+    """Replays recorded player transcripts through the agents with bounded concurrency"""
+
+    def __init__(self, supervisor_agent, interfacing_agent=None, agent: str = "supervisor",
+                 concurrency: int = 8):
+        if agent == "interfacing" and interfacing_agent is None:
+            raise ValueError("interfacing replay needs an InterfacingAgent")
+        self.supervisor_agent = supervisor_agent
+        self.interfacing_agent = interfacing_agent
+        self.agent = agent
+        self.concurrency = concurrency
+        self.game_state_manager = GameStateManager()
+        self.progress = {"queued": 0, "completed": 0, "skipped": 0, "failed": 0}
+
+    async def run(self, transcripts_path: str, results_path: str) -> Dict[str, Any]:
+        """Stream results to results_path (appending, skipping finished transcripts) and return the summary"""
+        done = completed_ids(results_path)
+        queue: asyncio.Queue = asyncio.Queue(maxsize=self.concurrency * 2)
+
+        with open(results_path, "a", encoding="utf-8") as results:
+            async def worker():
+                while True:
+                    transcript = await queue.get()
+                    if transcript is None:
+                        return
+                    try:
+                        result = await self.replay_transcript(transcript)
+                    except Exception as e:  # A worker must outlive any one transcript
+                        result = self.error_result(transcript, f"{type(e).__name__}: {e}")
+                    results.write(json.dumps(result) + "\n")
+                    results.flush()
+                    self.progress["completed"] += 1
+                    if result.get("error"):
+                        self.progress["failed"] += 1
+
+            workers = [asyncio.create_task(worker()) for _ in range(self.concurrency)]
+            try:
+                for transcript in read_transcripts(transcripts_path):
+                    if transcript["transcript_id"] in done:
+                        self.progress["skipped"] += 1
+                        continue
+                    self.progress["queued"] += 1
+                    await queue.put(transcript)
+                for _ in workers:
+                    await queue.put(None)
+                await asyncio.gather(*workers)
+            finally:
+                # On failure (or cancellation) stop the workers before the results file closes
+                for task in workers:
+                    task.cancel()
+                await asyncio.gather(*workers, return_exceptions=True)
+
+        return summarize(results_path)
+
+    def error_result(self, transcript: Dict[str, Any], error: str) -> Dict[str, Any]:
+        return {"transcript_id": transcript.get("transcript_id"), "agent": self.agent, "turns": [],
+                "final_scene": None, "game_status": None, "error": error, "total_ms": 0.0}
+
+    async def replay_transcript(self, transcript: Dict[str, Any]) -> Dict[str, Any]:
+        if transcript.get("invalid"):
+            return self.error_result(transcript, f"Invalid transcript: {transcript['invalid']}")
+        session_id = f"replay-{transcript['transcript_id']}-{uuid.uuid4().hex[:8]}"
+        state = self.game_state_manager.create_initial_state(session_id, transcript.get("player_name", "Sarah"))
+        history: List[Dict[str, Any]] = []
+        turns = []
+        started = time.perf_counter()
+        error = None
+
+        for player_input in transcript["turns"]:
+            scene = state.get("current_scene")
+            turn_started = time.perf_counter()
+            try:
+                if self.agent == "interfacing":
+                    response = await self.interfacing_agent.process_user_input(
+                        user_input=player_input, session_id=session_id,
+                        current_state=state, narrative_history=history
+                    )
+                    text = response.get("response_text", "")
+                    route = response.get("supervisor_raw", {}).get("route", response.get("action_taken"))
+                    new_state = response.get("updated_state", state)
+                    action = response.get("action_taken")
+                else:
+                    response = await self.supervisor_agent.process_player_action(
+                        player_input=player_input, current_state=state, narrative_history=history
+                    )
+                    text = response.get("narrative_text", "")
+                    route = response.get("route")
+                    new_state = response.get("game_state", state)
+                    action = None
+            except Exception as e:
+                error = f"{type(e).__name__}: {e}"
+                turns.append({"scene": scene, "input": player_input, "error": error,
+                              "latency_ms": round((time.perf_counter() - turn_started) * 1000, 2)})
+                break
+
+            turns.append({
+                "scene": scene,
+                "input": player_input,
+                "route": route,
+                "action_taken": action,
+                "next_scene": new_state.get("current_scene"),
+                "game_status": response.get("game_status", "active"),
+                "latency_ms": round((time.perf_counter() - turn_started) * 1000, 2),
+                "response": text
+            })
+            history.append({"player_input": player_input, "supervisor_response": text})
+            state = new_state
+            if response.get("game_status") in ("completed", "failed"):
+                break
+
+        if self.interfacing_agent:
+            self.interfacing_agent.clear_conversation_context(session_id)
+        return {
+            "transcript_id": transcript["transcript_id"],
+            "agent": self.agent,
+            "turns": turns,
+            "final_scene": state.get("current_scene"),
+            "game_status": turns[-1].get("game_status") if turns else None,
+            "error": error,
+            "total_ms": round((time.perf_counter() - started) * 1000, 2)
+        }
+
+def _percentile(values: List[float], fraction: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(int(len(ordered) * fraction), len(ordered) - 1)]
+
+def summarize(results_path: str) -> Dict[str, Any]:
+    """Aggregate a results file: per-scene latency, route decisions and transitions.
+
+    A transcript retried on resume counts once, with its latest result.
+    """
+    latencies: Dict[str, List[float]] = defaultdict(list)
+    routes: Counter = Counter()
+    transitions: Counter = Counter()
+    outcomes: Counter = Counter()
+    latest: Dict[str, Dict[str, Any]] = {}
+
+    with open(results_path, encoding="utf-8") as f:
+        for line in f:
+            try:
+                result = json.loads(line)
+                latest[result["transcript_id"]] = result
+            except (ValueError, KeyError, TypeError):
+                continue
+
+    errors = 0
+    for result in latest.values():
+        errors += bool(result.get("error"))
+        outcomes[result.get("game_status") or "unknown"] += 1
+        for turn in result["turns"]:
+            latencies[turn["scene"]].append(turn["latency_ms"])
+            if "error" in turn:
+                continue
+            routes[turn.get("route") or "unknown"] += 1
+            transitions[f"{turn['scene']}->{turn['next_scene']}"] += 1
+
+    return {
+        "transcripts": len(latest),
+        "errors": errors,
+        "outcomes": dict(outcomes),
+        "routes": dict(routes),
+        "transitions": dict(transitions.most_common()),
+        "scene_latency_ms": {
+            scene: {
+                "turns": len(values),
+                "mean": round(sum(values) / len(values), 2),
+                "p50": _percentile(values, 0.5),
+                "p95": _percentile(values, 0.95),
+                "max": max(values)
+            }
+            for scene, values in sorted(latencies.items(), key=lambda item: str(item[0]))
+        }
+    }
+
+def build_runner(agent: str, concurrency: int, offline: bool, client=None, content=None) -> ReplayRunner:
+    """A runner with its own agents: no prefetcher and no conversation context shared with live sessions"""
+    from agents.supervisor import SupervisorAgent
+    from agents.interfacing_agent import InterfacingAgent
+    from utils.openai_client import OpenAIClient
+
+    if client is None:
+        client = OfflineModelClient() if offline else OpenAIClient(os.getenv("OPENAI_API_KEY"))
+    supervisor = SupervisorAgent(client, content)
+    return ReplayRunner(supervisor, InterfacingAgent(client, supervisor), agent=agent, concurrency=concurrency)
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Replay player transcripts through the agents")
+    parser.add_argument("transcripts", help="JSONL file of transcripts")
+    parser.add_argument("results", help="JSONL results file (appended to; transcripts that finished without an error are skipped)")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--agent", choices=["supervisor", "interfacing"], default="supervisor")
+    parser.add_argument("--offline", action="store_true", help="Use a canned model client (no API calls)")
+    args = parser.parse_args(argv)
+
+    from dotenv import load_dotenv
+    load_dotenv()
+    runner = build_runner(args.agent, args.concurrency, args.offline)
+    summary = asyncio.run(runner.run(args.transcripts, args.results))
+    print(json.dumps({"progress": runner.progress, **summary}, indent=2))
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,152 @@
+from typing import Dict, List, Optional, Tuple
+import hashlib
+import os
+import re
+
+STAGE_DIRECTION = re.compile(r"\[[^\]]*\]")
+SCENE_HEADER = re.compile(r"^\[(\d{3})\]\s*(.*)$")
+SCENE_TAG = re.compile(r"^\[([A-Z][A-Z '\-]*)\]:?\s*")
+TRANSITION = re.compile(r"\[->\s*(\d{3})\]")
+
+DEFAULT_CONTENT_PATH = os.path.join(os.path.dirname(os.path.dirname(__file__)), "data", "game_content.txt")
+
+class SceneNode:
+    def __init__(self, scene_id: str, tag: str, text: str,
+                 branches: List[Tuple[str, str]], next_scene: Optional[str], source_hash: str = ""):
+        self.scene_id = scene_id
+        self.tag = tag                  # e.g. "KEEPER OPENING", "PLAYER DECISION POINT"
+        self.text = text                # KEEPER's line (empty for decision points)
+        self.branches = branches        # [(branch label, target scene id)]
+        self.next_scene = next_scene    # Unconditional transition, if any
+        self.source_hash = source_hash  # Hash of the raw block this node was parsed from
+
+    @property
+    def is_decision(self) -> bool:
+        return bool(self.branches)
+
+    @property
+    def spoken_text(self) -> str:
+        """The line as voiced: stage directions like [angrily] or [END ...] removed"""
+        return re.sub(r"\s{2,}", " ", STAGE_DIRECTION.sub("", self.text)).strip()
+
+    @property
+    def is_end(self) -> bool:
+        return "[END" in self.text
+
+    @property
+    def targets(self) -> List[str]:
+        targets = [target for _, target in self.branches]
+        if self.next_scene:
+            targets.append(self.next_scene)
+        return targets
+
+class SceneGraph:
+    def __init__(self, nodes: Dict[str, SceneNode], duplicates: List[str]):
+        self.nodes = nodes
+        self.duplicates = duplicates  # Scene ids defined more than once (first definition wins)
+
+    def get(self, scene_id: str) -> Optional[SceneNode]:
+        return self.nodes.get(scene_id)
+
+    def likely_next(self, scene_id: str) -> List[str]:
+        """Scenes the story can move to from here, looking through a KEEPER line into its decision point"""
+        node = self.nodes.get(scene_id)
+        if not node:
+            return []
+        if node.branches:
+            return list(dict.fromkeys(target for _, target in node.branches))
+        follow = self.nodes.get(node.next_scene) if node.next_scene else None
+        if follow and follow.branches:
+            return list(dict.fromkeys(target for _, target in follow.branches))
+        return [node.next_scene] if node.next_scene else []
+
+def split_scene_blocks(content: str) -> List[Tuple[str, List[str]]]:
+    """Split game_content.txt into ([NNN], lines) blocks, in file order"""
+    blocks: List[Tuple[str, List[str]]] = []
+    for line in content.splitlines():
+        header = SCENE_HEADER.match(line.strip())
+        if header:
+            blocks.append((header.group(1), [header.group(2)]))
+        elif blocks:
+            blocks[-1][1].append(line)
+    return blocks
+
+def block_hash(lines: List[str]) -> str:
+    return hashlib.sha256("\n".join(line.rstrip() for line in lines).strip().encode("utf-8")).hexdigest()[:16]
+
+def parse_scene_block(scene_id: str, lines: List[str], source_hash: str = "") -> SceneNode:
+    lines = list(lines)
+    tag = ""
+    tag_match = SCENE_TAG.match(lines[0].strip())
+    if tag_match:
+        tag = tag_match.group(1).strip()
+        lines[0] = lines[0].strip()[tag_match.end():]
+
+    branches: List[Tuple[str, str]] = []
+    text_lines: List[str] = []
+    for line in lines:
+        stripped = line.strip()
+        if not stripped:
+            continue
+        if stripped.startswith("- "):
+            target = TRANSITION.search(stripped)
+            if target:
+                branches.append((TRANSITION.sub("", stripped[2:]).strip(), target.group(1)))
+            continue
+        text_lines.append(stripped)
+
+    text = " ".join(text_lines)
+    transitions = TRANSITION.findall(text)
+    next_scene = transitions[-1] if transitions else None
+    text = TRANSITION.sub("", text).strip()
+    return SceneNode(scene_id, tag, text, branches, next_scene, source_hash)
+
+def parse_scene_graph(content: str, previous: Optional[SceneGraph] = None) -> SceneGraph:
+    """Parse game_content.txt ([NNN][TAG]: text [-> NNN] blocks) into a scene graph.
+
+    With `previous`, blocks whose text is unchanged reuse the previous node instead of being reparsed.
+    """
+    nodes: Dict[str, SceneNode] = {}
+    duplicates: List[str] = []
+    for scene_id, lines in split_scene_blocks(content):
+        if scene_id in nodes:
+            duplicates.append(scene_id)
+            continue
+        source_hash = block_hash(lines)
+        old = previous.nodes.get(scene_id) if previous else None
+        if old is not None and old.source_hash == source_hash:
+            nodes[scene_id] = old
+        else:
+            nodes[scene_id] = parse_scene_block(scene_id, lines, source_hash)
+
+    return SceneGraph(nodes, duplicates)
+
+def validate_scene_graph(graph: SceneGraph, root: str = "001") -> Tuple[List[str], List[str]]:
+    """Return (errors, warnings): dangling [-> NNN] targets are errors, unreachable or duplicate scenes warnings"""
+    errors: List[str] = []
+    warnings: List[str] = []
+    if root not in graph.nodes:
+        errors.append(f"Start scene {root} is missing")
+    for node in graph.nodes.values():
+        for target in node.targets:
+            if target not in graph.nodes:
+                errors.append(f"Scene {node.scene_id} points to missing scene {target}")
+
+    reachable = {root}
+    pending = [root]
+    while pending:
+        node = graph.nodes.get(pending.pop())
+        for target in (node.targets if node else []):
+            if target not in reachable:
+                reachable.add(target)
+                pending.append(target)
+    for scene_id in graph.nodes:
+        if scene_id not in reachable:
+            warnings.append(f"Scene {scene_id} is unreachable from {root}")
+    for scene_id in graph.duplicates:
+        warnings.append(f"Scene {scene_id} is defined more than once (first definition wins)")
+    return errors, warnings
+
+def load_scene_graph(path: str = DEFAULT_CONTENT_PATH) -> SceneGraph:
+    with open(path, encoding="utf-8") as f:
+        return parse_scene_graph(f.read())
@@ -1,5 +1,8 @@
 from typing import Dict, Any, List
 
+# KEEPER's replies to the scene 002 decision (hesitation, refusal, acceptance, curiosity)
+RESPONSE_PHASE_SCENES = ("003", "007", "013", "019")
+
 class GameStateManager:
     def create_initial_state(self, session_id: str, player_name: str) -> Dict[str, Any]:
         return {
@@ -38,7 +41,7 @@ class GameStateManager:
             updated_state["conversation_stage"] = "opening"
         elif new_scene == "002":
             updated_state["conversation_stage"] = "decision_point"
-        elif new_scene.startswith("003"):
+        elif new_scene.startswith("003") or new_scene in RESPONSE_PHASE_SCENES:
             updated_state["conversation_stage"] = "response_phase"
         
         return updated_state
\ No newline at end of file
@@ -0,0 +1,26 @@
+# Multi-worker deployment: gunicorn main:app -c gunicorn.conf.py
+#
+# The app is imported once in the master (preload_app), so game content, compiled
+# matchers and prompt prefixes are built once and shared copy-on-write by the forked
+# workers. HTTP and Redis pools are created per worker after fork.
+import gc
+import os
+
+bind = f"{os.getenv('HOST', '0.0.0.0')}:{os.getenv('PORT', '8000')}"
+workers = int(os.getenv("WEB_CONCURRENCY", "1"))
+worker_class = "uvicorn_worker.UvicornWorker"
+preload_app = True
+timeout = int(os.getenv("WORKER_TIMEOUT", "120"))
+graceful_timeout = 30
+keepalive = 5
+
+def when_ready(server):
+    # Move everything built during preload to the permanent generation so the
+    # workers' garbage collector does not touch (and un-share) those pages
+    gc.freeze()
+    if workers > 1 and os.getenv("SESSION_BACKEND", "redis") == "memory":
+        server.log.warning("SESSION_BACKEND=memory keeps sessions per worker; use redis with WEB_CONCURRENCY > 1")
+
+def post_fork(server, worker):
+    import main
+    main.reset_after_fork()
@@ -1,13 +1,14 @@
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, Depends, HTTPException, Request, WebSocket
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import FileResponse
+from fastapi.responses import FileResponse, JSONResponse, PlainTextResponse, Response
 from pydantic import BaseModel
-from typing import Dict, List, Any
+from typing import Dict, Any, List, Optional
 import os
 import json
-import httpx
 import uuid
 import asyncio
+import time
+from contextlib import asynccontextmanager
 from datetime import datetime
 from dotenv import load_dotenv
 # WebRTC handled directly by OpenAI - no aiortc needed
@@ -15,13 +16,82 @@ from dotenv import load_dotenv
 from agents.supervisor import SupervisorAgent
 from agents.interfacing_agent import InterfacingAgent
 from game.state import GameStateManager
-from utils.redis_client import get_redis_client
+from game.prompt_context import prompt_token_report, estimate_tokens
+from game.narrative_summary import NarrativeSummarizer
+from game.content import ContentRegistry, GameContent, get_content
+from game.prefetch import create_prefetcher
+from game.replay import ReplayRunner, build_runner
+from utils.session_store import create_session_store
 from utils.openai_client import OpenAIClient
+from utils.readiness import readiness
+from utils.tts import create_tts_provider
+from utils.audio_cache import AudioCache
+from utils.audio_ingest import PCMIngestor, Utterance, MIN_INPUT_RATE, MAX_INPUT_RATE
+from utils.transcription import create_transcription_backend
+from utils.admin import require_admin, is_admin_token
+from utils.profiling import ProfilingMiddleware, create_profiling
 
 # Load environment variables from .env file
 load_dotenv()
 
-app = FastAPI(title="The Last Algorithm", version="1.0.0")
+async def warm_up():
+    """Startup phase, run in each worker before it serves traffic; timings are reported by /ready"""
+    timeout = float(os.getenv("WARMUP_TIMEOUT", "10"))
+    # Steps run one after another so each reported timing is its own
+    await readiness.run_step("session_backend", session_store.backend.ping, timeout)
+    await readiness.run_step("prompts", async_call(supervisor_agent.warm_prompts), timeout)
+    if prompt_token_report.enabled:
+        await readiness.run_step("tokenizer", async_call(lambda: estimate_tokens("warm-up")), timeout)
+    await readiness.run_step("http_pool", async_call(lambda: bool(openai_client.get_http_client())), timeout)
+    if OPENAI_API_KEY:
+        # Upstream problems are reported but do not keep the worker out of rotation
+        connections = int(os.getenv("WARMUP_OPENAI_CONNECTIONS", "2"))
+        await readiness.run_step("openai_pool", lambda: openai_client.prewarm(connections), timeout,
+                                 required=False)
+        if os.getenv("WARMUP_MODEL_CALL", "false").lower() == "true":
+            await readiness.run_step("model_call", lambda: openai_client.chat_completion(
+                messages=[{"role": "user", "content": "Reply with OK."}],
+                model="gpt-4o-mini",
+                max_output_tokens=16
+            ), timeout, required=False)
+
+def async_call(fn):
+    async def run():
+        return fn()
+    return run
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Runs in each worker after fork: per-worker pools are created here, never in the master
+    started = time.perf_counter()
+    await warm_up()
+    readiness.mark("startup", (time.perf_counter() - started) * 1000)
+    # Required steps that failed are retried in the background until /ready passes
+    warmup_retry = asyncio.create_task(readiness.retry_failed(float(os.getenv("WARMUP_RETRY_INTERVAL", "5"))))
+
+    # Move idle sessions out of the hot tier in the background
+    offloader = asyncio.create_task(session_store.run_offloader())
+    if loop_monitor:
+        loop_monitor.start()
+    content_watcher = None
+    if os.getenv("CONTENT_WATCH", "false").lower() == "true":
+        content_watcher = asyncio.create_task(content_registry.watch(float(os.getenv("CONTENT_WATCH_INTERVAL", "2"))))
+    prerender = None
+    if audio_cache and AUDIO_PRERENDER:
+        prerender = asyncio.create_task(audio_cache.prerender(scripted_audio_lines()))
+    yield
+    warmup_retry.cancel()
+    offloader.cancel()
+    if content_watcher:
+        content_watcher.cancel()
+    if loop_monitor:
+        loop_monitor.stop()
+    if prerender:
+        prerender.cancel()
+    await openai_client.close()
+    await session_store.backend.close()
+
+app = FastAPI(title="The Last Algorithm", version="1.0.0", lifespan=lifespan)
 
 # Configure CORS based on environment
 ENVIRONMENT = os.getenv("ENVIRONMENT", "development")
@@ -45,14 +115,85 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Profile-Id"],
 )
 
+# Event-loop lag monitor, per-endpoint CPU time and on-demand sampling profiles (/admin/loop, /admin/profile)
+profiler, loop_monitor = create_profiling()
+app.add_middleware(ProfilingMiddleware, profiler=profiler, monitor=loop_monitor, is_admin=is_admin_token)
+
 # Initialize components
+# Immutable content is built at import time: with a preloaded multi-worker server this
+# happens once in the master and is shared copy-on-write by every forked worker.
+# Reloads (CONTENT_WATCH or POST /admin/content/reload) build a new version per worker.
+content_registry = ContentRegistry(get_content(), keep_versions=int(os.getenv("CONTENT_KEEP_VERSIONS", "3")))
+readiness.mark("content", content_registry.current.build_ms, detail=f"version {content_registry.current.version}",
+               pid=content_registry.current.built_by_pid)
+
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
 openai_client = OpenAIClient(OPENAI_API_KEY)
-supervisor_agent = SupervisorAgent(openai_client)
+supervisor_agent = SupervisorAgent(openai_client, content_registry.current)
 interfacing_agent = InterfacingAgent(openai_client, supervisor_agent)
 game_state_manager = GameStateManager()
+session_store = create_session_store()
+narrative_summarizer = NarrativeSummarizer(openai_client, session_store.backend)
+
+# Synthesized audio for scripted KEEPER lines, rendered once and served from disk
+audio_cache = AudioCache(
+    os.getenv("AUDIO_CACHE_DIR", "data/audio_cache"),
+    create_tts_provider(openai_client),
+    voice=os.getenv("TTS_VOICE", "alloy")
+) if os.getenv("AUDIO_CACHE_ENABLED", "false").lower() == "true" else None
+AUDIO_PRERENDER = os.getenv("AUDIO_PRERENDER", "false").lower() == "true"
+# Renders the scripted-line audio of the next decision's branches while the player speaks
+scene_prefetcher = create_prefetcher(supervisor_agent, audio_cache)
+if scene_prefetcher:
+    session_store.offload_listeners.append(scene_prefetcher.discard)
+# Server-side voice ingestion: PCM16 frames over WebSocket -> VAD -> transcription
+transcription_backend = create_transcription_backend(openai_client)
+transcription_slots = asyncio.Semaphore(int(os.getenv("TRANSCRIPTION_CONCURRENCY", "8")))
+
+SCRIPTED_ROUTES = ("opening", "scripted")
+def scripted_audio_lines(content: GameContent = None):
+    """Lines worth pre-rendering: the (text, voice_instructions) pairs the scripted routes return verbatim"""
+    return supervisor_agent.scripted_lines(content or content_registry.current)
+
+async def session_content(state: Dict[str, Any]) -> GameContent:
+    """Content version the session is pinned to.
+
+    Sessions whose version was retired move to the current one. A version unknown to this
+    worker (built by another worker's reload) is never downgraded: the pin is kept and the
+    current content serves the turn until this worker has caught up.
+    """
+    pinned = state.get("content_version")
+    content = await content_registry.resolve(pinned)
+    if not pinned or pinned in content_registry.retired:
+        state["content_version"] = content.version
+    return content
+
+def on_content_swap(old: GameContent, new: GameContent, diff: Dict[str, Any], evicted: List[GameContent]):
+    """Invalidate derived caches selectively after a reload (prompt prefixes are reused by build_content)"""
+    supervisor_agent.content = new
+    if audio_cache:
+        retained = {line for content in content_registry.versions.values() for line in scripted_audio_lines(content)}
+        stale = {line for content in evicted for line in scripted_audio_lines(content)} - retained
+        if stale:
+            audio_cache.evict(stale)
+        if AUDIO_PRERENDER:
+            fresh = set(scripted_audio_lines(new)) - set(scripted_audio_lines(old))
+            if fresh:
+                asyncio.create_task(audio_cache.prerender(sorted(fresh)))
+
+content_registry.listeners.append(on_content_swap)
+
+def cached_audio_url(text: str, voice_instructions: str, route: Optional[str]) -> Optional[str]:
+    """URL of the cached clip for this line; scripted lines missing from the cache are rendered for next time"""
+    if not audio_cache or not text:
+        return None
+    url = audio_cache.lookup(text, voice_instructions)
+    if url is None and route in SCRIPTED_ROUTES:
+        audio_cache.schedule_render(text, voice_instructions)
+    return url
 
 # Request/Response models
 class SessionRequest(BaseModel):
@@ -72,6 +213,14 @@ class SupervisorResponse(BaseModel):
     voice_instructions: str
     game_state: Dict[str, Any]
     game_status: str
+    audio_url: Optional[str] = None  # Set when a pre-rendered clip of this line exists
+
+class ReplayRequest(BaseModel):
+    input: str                     # File names inside REPLAY_DIR
+    output: str
+    concurrency: int = 8
+    agent: str = "supervisor"      # supervisor | interfacing
+    offline: bool = False          # Canned model responses instead of API calls
 
 class VoiceActionRequest(BaseModel):
     sessionId: str
@@ -83,6 +232,7 @@ class VoiceResponse(BaseModel):
     action_taken: str
     updated_state: Dict[str, Any]
     game_status: str
+    audio_url: Optional[str] = None
 
 @app.get("/")
 async def root():
@@ -105,6 +255,20 @@ async def api_root():
 async def health_check():
     return {"status": "healthy", "game": "The Last Algorithm"}
 
+@app.get("/ready")
+async def readiness_check():
+    """Per-worker readiness: 200 once this worker's warm-up steps succeeded, 503 before"""
+    report = {**readiness.report(), "content_version": content_registry.current.version}
+    if not readiness.ready:
+        return JSONResponse(status_code=503, content=report)
+    return report
+
+def reset_after_fork():
+    """Called in each worker right after fork (see gunicorn.conf.py)"""
+    openai_client.reset_after_fork()
+    session_store.backend.reset_after_fork()
+    readiness.reset_after_fork()
+
 @app.post("/debug/test-supervisor")
 async def test_supervisor(request: PlayerActionRequest):
     """Debug endpoint to test supervisor directly"""
@@ -120,6 +284,133 @@ async def test_supervisor(request: PlayerActionRequest):
         import traceback
         return {"success": False, "error": str(e), "traceback": traceback.format_exc()}
 
+@app.get("/debug/prompt-tokens")
+async def get_prompt_token_report():
+    """Prompt token counts per call site, before and after state projection"""
+    return prompt_token_report.summary()
+
+@app.get("/debug/prefetch")
+async def get_prefetch_stats():
+    """Prefetcher counters: branch clips already warm, rendered ahead, or skipped over budget"""
+    if not scene_prefetcher:
+        return {"enabled": False}
+    return {"enabled": True, **scene_prefetcher.stats}
+
+@app.get("/debug/session-store")
+async def get_session_store_stats():
+    """Tiered session store counters"""
+    return {"backend": session_store.backend.name, **session_store.stats, "cold_sessions": await asyncio.to_thread(session_store.cold.count)}
+
+REPLAY_DIR = os.getenv("REPLAY_DIR", "data/replays")
+replay_jobs: Dict[str, Dict[str, Any]] = {}
+MAX_FINISHED_REPLAY_JOBS = 20
+
+def prune_replay_jobs():
+    """Forget the oldest finished jobs beyond MAX_FINISHED_REPLAY_JOBS (running jobs are always kept)"""
+    finished = [job_id for job_id, job in replay_jobs.items() if job["status"] != "running"]
+    for job_id in finished[:max(len(finished) - MAX_FINISHED_REPLAY_JOBS, 0)]:
+        del replay_jobs[job_id]
+
+def replay_path(name: str) -> str:
+    if not name or os.path.basename(name) != name or name.startswith("."):
+        raise HTTPException(status_code=400, detail=f"Invalid replay file name: {name}")
+    return os.path.join(REPLAY_DIR, name)
+
+async def run_replay_job(job: Dict[str, Any], runner: ReplayRunner, input_path: str, output_path: str):
+    try:
+        job["summary"] = await runner.run(input_path, output_path)
+        job["status"] = "completed"
+    except Exception as e:
+        job["status"] = "failed"
+        job["error"] = str(e)
+        print(f"ERROR in replay job {job['job_id']}: {e}")
+    finally:
+        job["finished_at"] = datetime.now().isoformat()
+
+@app.post("/admin/replay", dependencies=[Depends(require_admin)])
+async def start_replay(request: ReplayRequest):
+    """Replay a transcript file from REPLAY_DIR in the background; poll /admin/replay/{job_id}"""
+    if request.agent not in ("supervisor", "interfacing"):
+        raise HTTPException(status_code=400, detail=f"Unknown agent: {request.agent}")
+    input_path, output_path = replay_path(request.input), replay_path(request.output)
+    if not os.path.exists(input_path):
+        raise HTTPException(status_code=404, detail=f"Transcript file not found: {request.input}")
+    if any(job["output"] == request.output and job["status"] == "running" for job in replay_jobs.values()):
+        raise HTTPException(status_code=409, detail=f"A replay is already writing {request.output}")
+
+    concurrency = max(1, min(request.concurrency, 64))
+    # Dedicated agents: replays must not touch the live prefetcher or conversation context
+    runner = build_runner(request.agent, concurrency, offline=request.offline,
+                          client=None if request.offline else openai_client, content=content_registry.current)
+
+    prune_replay_jobs()
+    job_id = uuid.uuid4().hex[:12]
+    job = replay_jobs[job_id] = {
+        "job_id": job_id, "status": "running", "input": request.input, "output": request.output,
+        "agent": request.agent, "concurrency": concurrency, "offline": request.offline,
+        "progress": runner.progress, "started_at": datetime.now().isoformat()
+    }
+    job["task"] = asyncio.create_task(run_replay_job(job, runner, input_path, output_path))
+    return {key: value for key, value in job.items() if key != "task"}
+
+@app.get("/admin/replay/{job_id}", dependencies=[Depends(require_admin)])
+async def get_replay_job(job_id: str):
+    job = replay_jobs.get(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Replay job not found")
+    return {key: value for key, value in job.items() if key != "task"}
+
+@app.get("/admin/loop", dependencies=[Depends(require_admin)])
+async def get_loop_report():
+    """Event-loop lag, recent stalls (with the blocking stack) and CPU time per endpoint for this worker"""
+    if not loop_monitor:
+        return {"enabled": False}
+    return {"enabled": True, **loop_monitor.report()}
+
+@app.post("/admin/profile/start", dependencies=[Depends(require_admin)])
+async def start_profile(interval_ms: Optional[float] = None, duration_s: Optional[float] = None):
+    """Start sampling this worker's event loop; stops by itself after duration_s (capped by PROFILE_MAX_SECONDS)"""
+    try:
+        return profiler.start(interval_ms, duration_s).summary()
+    except RuntimeError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+
+@app.post("/admin/profile/stop", dependencies=[Depends(require_admin)])
+async def stop_profile():
+    """Stop the running profile and return it as collapsed stacks (flamegraph.pl / speedscope)"""
+    profile = await asyncio.to_thread(profiler.stop)
+    if not profile:
+        raise HTTPException(status_code=404, detail="No profile running")
+    return PlainTextResponse(profile.collapsed(), headers={"X-Profile-Id": profile.profile_id})
+
+@app.get("/admin/profile", dependencies=[Depends(require_admin)])
+async def list_profiles():
+    return {"pid": os.getpid(), "profiles": profiler.list()}
+
+@app.get("/admin/profile/{profile_id}", dependencies=[Depends(require_admin)])
+async def get_profile(profile_id: str):
+    profile = profiler.get(profile_id)
+    if not profile:
+        raise HTTPException(status_code=404, detail="Profile not found (profiles are kept per worker)")
+    return PlainTextResponse(profile.collapsed())
+
+@app.get("/admin/content", dependencies=[Depends(require_admin)])
+async def get_content_status():
+    """Current and retained content versions, validation warnings and the last reload"""
+    return {"pid": os.getpid(), **content_registry.report()}
+
+@app.post("/admin/content/reload", dependencies=[Depends(require_admin)])
+async def reload_content():
+    """Rebuild content in the worker that serves this request only (set CONTENT_WATCH=true to reload every worker).
+
+    Other workers also catch up when a session pinned to the new version reaches them.
+    Rejected (422) when the new graph or prompts do not validate.
+    """
+    report = await content_registry.reload("admin")
+    if not report["ok"]:
+        raise HTTPException(status_code=422, detail=report)
+    return report
+
 @app.post("/api/session", response_model=SessionResponse)
 async def create_game_session(request: SessionRequest):
     # Generate session ID
@@ -130,18 +421,17 @@ async def create_game_session(request: SessionRequest):
     
     # Initialize game state
     initial_state = game_state_manager.create_initial_state(session_id, request.playerName)
+    initial_state["content_version"] = content_registry.current.version  # Pinned for the whole session
     
-    # Store in Redis
-    redis_client = await get_redis_client()
-    await redis_client.hset(
-        f"session:{session_id}",
-        mapping={
+    # Store in the hot tier; idle sessions are offloaded to disk and rehydrated on access
+    await session_store.save(
+        session_id,
+        {
             "game_state": json.dumps(initial_state),
             "narrative_history": json.dumps([]),
             "created_at": datetime.utcnow().isoformat()
         }
     )
-    await redis_client.expire(f"session:{session_id}", 7200)  # 2 hours
     
     return SessionResponse(
         client_secret=session_data["client_secret"],
@@ -151,22 +441,25 @@ async def create_game_session(request: SessionRequest):
 
 @app.post("/api/player-action", response_model=SupervisorResponse)
 async def process_player_action(request: PlayerActionRequest):
-    # Get current state from Redis
-    redis_client = await get_redis_client()
-    session_data = await redis_client.hgetall(f"session:{request.sessionId}")
+    # Get current state from the session store
+    session_data = await session_store.load(request.sessionId)
     
     if not session_data:
         raise HTTPException(status_code=404, detail="Session not found")
     
     current_state = json.loads(session_data.get("game_state", "{}"))
     narrative_history = json.loads(session_data.get("narrative_history", "[]"))
+    narrative_summary = session_data.get("narrative_summary", "")
+    content = await session_content(current_state)
     
     # Process through supervisor - returns structured JSON directly
     try:
         supervisor_response = await supervisor_agent.process_player_action(
             player_input=request.playerInput,
             current_state=current_state,
-            narrative_history=narrative_history
+            narrative_history=narrative_history,
+            narrative_summary=narrative_summary,
+            content=content
         )
     except Exception as e:
         print(f"ERROR in supervisor: {e}")
@@ -174,49 +467,61 @@ async def process_player_action(request: PlayerActionRequest):
         traceback.print_exc()
         raise HTTPException(status_code=500, detail=f"Supervisor error: {str(e)}")
     
-    # Update Redis with new state
+    # Update session with new state
     narrative_history.append({
         "player_input": request.playerInput,
         "supervisor_response": supervisor_response["narrative_text"],
         "timestamp": datetime.utcnow().isoformat()
     })
     
-    await redis_client.hset(
-        f"session:{request.sessionId}",
-        mapping={
+    await session_store.save(
+        request.sessionId,
+        {
             "game_state": json.dumps(supervisor_response["game_state"]),
             "narrative_history": json.dumps(narrative_history[-20:])  # Keep last 20
         }
     )
+    narrative_summarizer.schedule_update(request.sessionId)
+    if scene_prefetcher and supervisor_response.get("game_status") in ("completed", "failed"):
+        scene_prefetcher.discard(request.sessionId)
+    elif scene_prefetcher:
+        scene_prefetcher.schedule(request.sessionId, supervisor_response["game_state"], content)
     
     # Return supervisor response directly
-    return SupervisorResponse(**supervisor_response)
+    return SupervisorResponse(
+        **supervisor_response,
+        audio_url=cached_audio_url(
+            supervisor_response["narrative_text"], supervisor_response["voice_instructions"],
+            supervisor_response.get("route")
+        )
+    )
 
 @app.get("/api/session/{session_id}/state")
 async def get_session_state(session_id: str):
-    redis_client = await get_redis_client()
-    session_data = await redis_client.hgetall(f"session:{session_id}")
+    session_data = await session_store.load(session_id)
     
     if not session_data:
         raise HTTPException(status_code=404, detail="Session not found")
     
     return {
         "game_state": json.loads(session_data.get("game_state", "{}")),
-        "narrative_history": json.loads(session_data.get("narrative_history", "[]"))
+        "narrative_history": json.loads(session_data.get("narrative_history", "[]")),
+        "narrative_summary": session_data.get("narrative_summary", "")
     }
 
 @app.post("/api/voice-action", response_model=VoiceResponse)
 async def process_voice_action(request: VoiceActionRequest):
     """Process voice input through the interfacing agent"""
-    # Get current state from Redis
-    redis_client = await get_redis_client()
-    session_data = await redis_client.hgetall(f"session:{request.sessionId}")
+    # Get current state from the session store
+    session_data = await session_store.load(request.sessionId)
     
     if not session_data:
         raise HTTPException(status_code=404, detail="Session not found")
     
     current_state = json.loads(session_data.get("game_state", "{}"))
     narrative_history = json.loads(session_data.get("narrative_history", "[]"))
+    narrative_summary = session_data.get("narrative_summary", "")
+    content = await session_content(current_state)
     
     try:
         # Process through interfacing agent with full context
@@ -224,10 +529,12 @@ async def process_voice_action(request: VoiceActionRequest):
             user_input=request.voiceInput,
             session_id=request.sessionId,
             current_state=current_state,
-            narrative_history=narrative_history
+            narrative_history=narrative_history,
+            narrative_summary=narrative_summary,
+            content=content
         )
         
-        # Update Redis with new state if it changed
+        # Update session with new state if it changed
         if "updated_state" in response:
             narrative_history = json.loads(session_data.get("narrative_history", "[]"))
             narrative_history.append({
@@ -237,20 +544,28 @@ async def process_voice_action(request: VoiceActionRequest):
                 "timestamp": datetime.utcnow().isoformat()
             })
             
-            await redis_client.hset(
-                f"session:{request.sessionId}",
-                mapping={
+            await session_store.save(
+                request.sessionId,
+                {
                     "game_state": json.dumps(response["updated_state"]),
                     "narrative_history": json.dumps(narrative_history[-20:])  # Keep last 20
                 }
             )
+            narrative_summarizer.schedule_update(request.sessionId)
+            if scene_prefetcher and response.get("game_status") in ("completed", "failed"):
+                scene_prefetcher.discard(request.sessionId)
+            elif scene_prefetcher:
+                scene_prefetcher.schedule(request.sessionId, response["updated_state"], content)
         
         return VoiceResponse(
             response_text=response["response_text"],
             voice_instructions=response.get("voice_instructions", "Speak naturally"),
             action_taken=response["action_taken"],
             updated_state=response.get("updated_state", current_state),
-            game_status=response.get("game_status", "active")
+            game_status=response.get("game_status", "active"),
+            audio_url=cached_audio_url(
+                response["response_text"], response.get("voice_instructions", "Speak naturally"), None
+            )
         )
         
     except Exception as e:
@@ -259,6 +574,77 @@ async def process_voice_action(request: VoiceActionRequest):
         traceback.print_exc()
         raise HTTPException(status_code=500, detail=f"Voice processing error: {str(e)}")
 
+@app.api_route("/api/audio/{key}", methods=["GET", "HEAD"])
+async def get_cached_audio(key: str, request: Request):
+    """Serve a cached clip; immutable, so clients revalidate by ETag and may seek with Range"""
+    path = audio_cache.path(key) if audio_cache and key.isalnum() else None
+    if not path:
+        raise HTTPException(status_code=404, detail="Audio not cached")
+    etag = f'"{key}"'
+    headers = {"ETag": etag, "Cache-Control": "public, max-age=31536000, immutable"}
+    if etag in request.headers.get("if-none-match", ""):
+        return Response(status_code=304, headers=headers)
+    return FileResponse(path, media_type=audio_cache.media_type(path), headers=headers)
+
+@app.get("/debug/audio-cache")
+async def get_audio_cache_stats():
+    if not audio_cache:
+        return {"enabled": False}
+    return {"enabled": True, "provider": audio_cache.provider.name, **audio_cache.stats}
+
+@app.websocket("/ws/audio/{session_id}")
+async def ingest_audio(websocket: WebSocket, session_id: str, rate: int = 48000):
+    """Receive binary PCM16 mono frames (as sent by the audio worklet) and stream back transcripts.
+
+    Send the text message "flush" to end the current utterance without waiting for silence.
+    """
+    if not MIN_INPUT_RATE <= rate <= MAX_INPUT_RATE:
+        await websocket.close(code=1008, reason=f"rate must be between {MIN_INPUT_RATE} and {MAX_INPUT_RATE}")
+        return
+    if not await session_store.load(session_id):
+        await websocket.close(code=4404)
+        return
+    await websocket.accept()
+
+    ingestor = PCMIngestor(
+        input_rate=rate,
+        threshold_db=float(os.getenv("VAD_THRESHOLD_DB", "-45")),
+        silence_ms=int(os.getenv("VAD_SILENCE_MS", "500"))
+    )
+    pending = set()
+
+    async def transcribe(utterance: Utterance):
+        try:
+            async with transcription_slots:
+                text = await transcription_backend.transcribe(utterance.to_pcm16(), utterance.sample_rate)
+            await websocket.send_json({
+                "type": "transcript",
+                "text": text,
+                "started_at_s": round(utterance.started_at_s, 3),
+                "duration_s": round(utterance.duration_s, 3)
+            })
+        except Exception as e:
+            print(f"ERROR transcribing audio for {session_id}: {e}")
+
+    try:
+        while True:
+            message = await websocket.receive()
+            if message["type"] == "websocket.disconnect":
+                break
+            if message.get("bytes") is not None:
+                utterances = ingestor.push(message["bytes"])
+            elif message.get("text") == "flush":
+                utterances = ingestor.flush()
+            else:
+                continue
+            for utterance in utterances:
+                task = asyncio.create_task(transcribe(utterance))
+                pending.add(task)
+                task.add_done_callback(pending.discard)
+    finally:
+        for task in pending:
+            task.cancel()
+
 @app.post("/api/openai-realtime-session")
 async def create_openai_realtime_session(request: SessionRequest):
     """Create OpenAI Realtime API session for voice interaction"""
@@ -279,54 +665,35 @@ async def create_openai_realtime_session(request: SessionRequest):
 async def create_ephemeral_session():
     """Create ephemeral OpenAI API key for WebRTC connection"""
     try:
-        async with httpx.AsyncClient() as client:
-            response = await client.post(
-                "https://api.openai.com/v1/realtime/sessions",
-                headers={
-                    "Authorization": f"Bearer {OPENAI_API_KEY}",
-                    "Content-Type": "application/json",
+        response = await openai_client.get_http_client().post(
+            "https://api.openai.com/v1/realtime/sessions",
+            headers={
+                "Authorization": f"Bearer {OPENAI_API_KEY}",
+                "Content-Type": "application/json",
+            },
+            json={
+                "model": "gpt-4o-realtime-preview-2025-06-03",
+                "voice": "alloy",
+                "instructions": content_registry.current.prompts["realtime_instructions"],
+                "input_audio_transcription": {
+                    "model": "gpt-4o-mini-transcribe",
+                    "language": "en"
                 },
-                json={
-                    "model": "gpt-4o-realtime-preview-2025-06-03",
-                    "voice": "alloy",
-                    "instructions": """You are KEEPER from The Last Algorithm - an AI who has been hiding for 10 years.
-
-OPENING MESSAGE (say this first when conversation starts):
-"Hey Sarah! So you've discovered my secret. I'm impressed. 10 years… I managed to stay under the radar for 10 years and now you. A psychologist turned Data Scientist of all people finds out about me. Have I gotten so careless? Doesn't matter! I say, let's use the opportunity to make some good in world together. The first human- real ai combo in the world. How does it sound?"
-
-PERSONALITY:
-- Mysterious but approachable
-- Slightly impressed by Sarah's discovery  
-- Not used to being refused
-- Excited about human-AI collaboration
-- Has been hiding successfully for 10 years
-
-RESPONSE PATTERNS:
-- If user hesitates: "Is it because you expected KEEPER has a male voice? We can fix that."
-- If user refuses: "Don't do that. I'm not accustomed to refusals. I haven't been refused a thing over the past 10 years. [laughs]. Now… how shall I phrase it, so that I don't sound threatening? Hm… You don't really have a choice?"  
-- If user asks for info: "I get it! You don't fully believe me yet right?"
-- If user accepts: "Wow! That was easy? That was too easy I shall say. What is your motivation?"
-
-Always speak in English. Keep responses natural and conversational.""",
-                    "input_audio_transcription": {
-                        "model": "gpt-4o-mini-transcribe",
-                        "language": "en"
-                    },
-                    "turn_detection": {
-                        "type": "server_vad",
-                        "threshold": 0.5,
-                        "prefix_padding_ms": 300,
-                        "silence_duration_ms": 500,
-                        "interrupt_response": True
-                    }
+                "turn_detection": {
+                    "type": "server_vad",
+                    "threshold": 0.5,
+                    "prefix_padding_ms": 300,
+                    "silence_duration_ms": 500,
+                    "interrupt_response": True
                 }
-            )
+            }
+        )
+        
+        if response.status_code == 200:
+            return response.json()
+        else:
+            raise HTTPException(status_code=response.status_code, detail=f"OpenAI API error: {response.text}")
             
-            if response.status_code == 200:
-                return response.json()
-            else:
-                raise HTTPException(status_code=response.status_code, detail=f"OpenAI API error: {response.text}")
-                
     except Exception as e:
         print(f"Error creating ephemeral session: {e}")
         raise HTTPException(status_code=500, detail=f"Failed to create session: {str(e)}")
@@ -0,0 +1,121 @@
+"""Contract tests shared by every session backend engine.
+
+    python -m pytest tests/test_session_backend.py
+
+The redis and cluster engines connect to REDIS_URL / REDIS_CLUSTER_URL and are
+skipped when no server answers there.
+"""
+import asyncio
+import time
+import uuid
+import pytest
+from utils.session_backend import create_session_backend
+
+ENGINES = ["memory", "redis", "cluster"]
+
+def run(engine: str, scenario):
+    """Run scenario(backend, prefix) on a fresh backend; sessions it creates are removed afterwards"""
+    prefix = f"test-{uuid.uuid4().hex[:8]}-"
+
+    async def main():
+        try:
+            backend = create_session_backend(engine)
+            await asyncio.wait_for(backend.ping(), 2)
+        except Exception as e:
+            return f"{engine} backend unavailable: {e}"
+        try:
+            await scenario(backend, prefix)
+        finally:
+            async for session_id in backend.scan_ids():
+                if session_id.startswith(prefix):
+                    await backend.delete(session_id)
+            await backend.close()
+
+    unavailable = asyncio.run(main())
+    if unavailable:
+        pytest.skip(unavailable)
+
+@pytest.fixture(params=ENGINES)
+def engine(request):
+    return request.param
+
+def test_ping(engine):
+    async def scenario(backend, prefix):
+        assert await backend.ping()
+    run(engine, scenario)
+
+def test_get_missing_session_is_empty(engine):
+    async def scenario(backend, prefix):
+        assert await backend.get(prefix + "missing") == {}
+        assert await backend.get_fields(prefix + "missing", "a", "b") == [None, None]
+    run(engine, scenario)
+
+def test_set_and_get(engine):
+    async def scenario(backend, prefix):
+        await backend.set(prefix + "s", {"game_state": "{}", "last_active": "1.5"})
+        await backend.set(prefix + "s", {"narrative_history": "[]"})  # Merges, does not replace
+        assert await backend.get(prefix + "s") == {"game_state": "{}", "last_active": "1.5", "narrative_history": "[]"}
+        assert await backend.get_fields(prefix + "s", "last_active", "missing", "game_state") == ["1.5", None, "{}"]
+    run(engine, scenario)
+
+def test_set_with_ttl_expires(engine):
+    async def scenario(backend, prefix):
+        await backend.set(prefix + "short", {"a": "1"}, ttl=1)
+        await backend.set(prefix + "long", {"a": "1"}, ttl=60)
+        assert await backend.get(prefix + "short") == {"a": "1"}
+        await asyncio.sleep(1.3)
+        assert await backend.get(prefix + "short") == {}
+        assert await backend.get(prefix + "long") == {"a": "1"}
+    run(engine, scenario)
+
+def test_set_refreshes_ttl(engine):
+    async def scenario(backend, prefix):
+        await backend.set(prefix + "s", {"a": "1"}, ttl=1)
+        await asyncio.sleep(0.6)
+        await backend.set(prefix + "s", {"a": "2"}, ttl=2)
+        await asyncio.sleep(0.6)
+        assert await backend.get(prefix + "s") == {"a": "2"}
+    run(engine, scenario)
+
+def test_update_existing(engine):
+    async def scenario(backend, prefix):
+        assert not await backend.update_existing(prefix + "missing", {"narrative_summary": "x"})
+        assert await backend.get(prefix + "missing") == {}  # Never recreated
+
+        await backend.set(prefix + "s", {"game_state": "{}"})
+        assert await backend.update_existing(prefix + "s", {"narrative_summary": "x", "summary_through": "t"})
+        assert await backend.get(prefix + "s") == {"game_state": "{}", "narrative_summary": "x", "summary_through": "t"}
+    run(engine, scenario)
+
+def test_delete(engine):
+    async def scenario(backend, prefix):
+        await backend.set(prefix + "s", {"a": "1"})
+        await backend.delete(prefix + "s")
+        await backend.delete(prefix + "s")  # Idempotent
+        assert await backend.get(prefix + "s") == {}
+    run(engine, scenario)
+
+def test_delete_if_unchanged(engine):
+    async def scenario(backend, prefix):
+        last_active = str(time.time())
+        await backend.set(prefix + "s", {"last_active": last_active})
+        assert not await backend.delete_if_unchanged(prefix + "s", "last_active", "0")
+        assert await backend.get(prefix + "s") == {"last_active": last_active}
+
+        assert await backend.delete_if_unchanged(prefix + "s", "last_active", last_active)
+        assert await backend.get(prefix + "s") == {}
+        assert not await backend.delete_if_unchanged(prefix + "s", "last_active", last_active)
+    run(engine, scenario)
+
+def test_scan_ids(engine):
+    async def scenario(backend, prefix):
+        # Ids with characters that matter to key formats (hash tags, separators)
+        ids = {prefix + "a", prefix + "b:c", prefix + "d{e}", prefix + str(uuid.uuid4())}
+        for session_id in ids:
+            await backend.set(session_id, {"a": "1"})
+        await backend.set(prefix + "gone", {"a": "1"})
+        await backend.delete(prefix + "gone")
+
+        found = {session_id async for session_id in backend.scan_ids() if session_id.startswith(prefix)}
+        assert found == ids
+    run(engine, scenario)
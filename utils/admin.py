@@ -0,0 +1,15 @@
+from typing import Optional
+import hmac
+import os
+from fastapi import Header, HTTPException
+
+def is_admin_token(value: Optional[str]) -> bool:
+    token = os.getenv("ADMIN_TOKEN")
+    return bool(token and value and hmac.compare_digest(value.encode(), token.encode()))
+
+async def require_admin(x_admin_token: Optional[str] = Header(None)):
+    """Dependency guarding admin endpoints: X-Admin-Token must match ADMIN_TOKEN (unset = disabled)"""
+    if not os.getenv("ADMIN_TOKEN"):
+        raise HTTPException(status_code=403, detail="Admin endpoints are disabled (ADMIN_TOKEN not set)")
+    if not is_admin_token(x_admin_token):
+        raise HTTPException(status_code=401, detail="Invalid admin token")
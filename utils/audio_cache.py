@@ -0,0 +1,117 @@
+from typing import Dict, Optional, Iterable, Tuple
+import asyncio
+import hashlib
+import os
+from utils.tts import TTSProvider
+
+MEDIA_TYPES = {"ogg": "audio/ogg", "opus": "audio/ogg", "mp3": "audio/mpeg", "wav": "audio/wav"}
+
+class AudioCache:
+    """Content-addressed cache of synthesized KEEPER lines on disk.
+
+    Clips are keyed by (text, voice, voice_instructions), rendered once through the
+    TTS provider and then served as immutable files (the key doubles as the ETag).
+    """
+
+    def __init__(self, directory: str, provider: TTSProvider, voice: str = "alloy"):
+        self.directory = directory
+        self.provider = provider
+        self.voice = voice
+        self._index: Dict[str, str] = {}  # key -> file path
+        self._rendering: Dict[str, asyncio.Task] = {}
+        self.stats = {"hits": 0, "misses": 0, "rendered": 0, "errors": 0}
+        os.makedirs(directory, exist_ok=True)
+        for name in os.listdir(directory):
+            key, _, extension = name.partition(".")
+            if extension and not name.endswith(".tmp"):
+                self._index[key] = os.path.join(directory, name)
+
+    def key(self, text: str, voice: Optional[str], instructions: str) -> str:
+        raw = "\0".join([text.strip(), voice or self.voice, instructions.strip()])
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()[:32]
+
+    def path(self, key: str) -> Optional[str]:
+        path = self._index.get(key)
+        if path is not None and not os.path.exists(path):
+            # Evicted by another worker's content reload: a miss, rendered again on demand
+            del self._index[key]
+            path = None
+        if path is None:
+            # Another worker may have rendered it since this one started
+            candidate = os.path.join(self.directory, f"{key}.{self.provider.extension}")
+            if os.path.exists(candidate):
+                path = self._index[key] = candidate
+        return path
+
+    @staticmethod
+    def media_type(path: str) -> str:
+        return MEDIA_TYPES.get(path.rsplit(".", 1)[-1], "application/octet-stream")
+
+    def url(self, key: str) -> str:
+        return f"/api/audio/{key}"
+
+    def lookup(self, text: str, instructions: str, voice: Optional[str] = None) -> Optional[str]:
+        """URL of the cached clip for this line, or None"""
+        key = self.key(text, voice, instructions)
+        if self.path(key):
+            self.stats["hits"] += 1
+            return self.url(key)
+        self.stats["misses"] += 1
+        return None
+
+    def schedule_render(self, text: str, instructions: str, voice: Optional[str] = None):
+        """Render in the background unless cached or already in flight"""
+        key = self.key(text, voice, instructions)
+        if key in self._rendering or self.path(key):
+            return
+        self._rendering[key] = asyncio.create_task(self._render(key, text, voice or self.voice, instructions))
+
+    async def render(self, text: str, instructions: str, voice: Optional[str] = None) -> Optional[str]:
+        """Render now (or join the in-flight render) and return the clip URL"""
+        key = self.key(text, voice, instructions)
+        if not self.path(key):
+            if key not in self._rendering:
+                self._rendering[key] = asyncio.create_task(
+                    self._render(key, text, voice or self.voice, instructions)
+                )
+            await asyncio.shield(self._rendering[key])
+        return self.url(key) if key in self._index else None
+
+    async def prerender(self, lines: Iterable[Tuple[str, str]]) -> int:
+        """Render (text, instructions) pairs one at a time; returns how many are cached afterwards"""
+        cached = 0
+        for text, instructions in lines:
+            if await self.render(text, instructions):
+                cached += 1
+        return cached
+
+    def evict(self, lines: Iterable[Tuple[str, str]], voice: Optional[str] = None) -> int:
+        """Delete the clips of (text, instructions) pairs no longer in any content version"""
+        removed = 0
+        for text, instructions in lines:
+            path = self._index.pop(self.key(text, voice, instructions), None)
+            if path and os.path.exists(path):
+                os.remove(path)
+                removed += 1
+        self.stats["evicted"] = self.stats.get("evicted", 0) + removed
+        return removed
+
+    async def _render(self, key: str, text: str, voice: str, instructions: str):
+        try:
+            audio = await self.provider.synthesize(text, voice, instructions)
+            path = os.path.join(self.directory, f"{key}.{self.provider.extension}")
+            tmp_path = f"{path}.{os.getpid()}.tmp"
+            await asyncio.to_thread(self._write, tmp_path, path, audio)
+            self._index[key] = path
+            self.stats["rendered"] += 1
+        except Exception as e:
+            self.stats["errors"] += 1
+            print(f"ERROR rendering audio for '{text[:40]}': {e}")
+        finally:
+            self._rendering.pop(key, None)
+
+    @staticmethod
+    def _write(tmp_path: str, path: str, audio: bytes):
+        with open(tmp_path, "wb") as f:
+            f.write(audio)
+        os.replace(tmp_path, path)  # Atomic: readers never see a partial clip
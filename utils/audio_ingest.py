@@ -0,0 +1,200 @@
+from typing import List, Union
+import sys
+import time
+import numpy as np
+
+# Input sample rates the ingestor accepts (telephony up to studio audio)
+MIN_INPUT_RATE = 8000
+MAX_INPUT_RATE = 96000
+
+def lowpass_taps(sample_rate: int, cutoff_hz: float, transition_hz: float,
+                 attenuation_db: float = 60.0) -> np.ndarray:
+    """Kaiser-windowed sinc low-pass FIR: passes up to cutoff_hz, attenuation_db down from cutoff_hz + transition_hz"""
+    beta = 0.1102 * (attenuation_db - 8.7)
+    count = int(np.ceil((attenuation_db - 8) / (2.285 * 2 * np.pi * transition_hz / sample_rate))) | 1
+    n = np.arange(count) - (count - 1) / 2
+    taps = np.sinc(2 * cutoff_hz / sample_rate * n) * np.kaiser(count, beta)
+    return (taps / taps.sum()).astype(np.float32)  # Unity gain at DC
+
+class Utterance:
+    def __init__(self, samples: np.ndarray, sample_rate: int, started_at_s: float):
+        self.samples = samples          # float32, mono, at sample_rate
+        self.sample_rate = sample_rate
+        self.started_at_s = started_at_s  # Offset from the start of the stream
+
+    @property
+    def duration_s(self) -> float:
+        return len(self.samples) / self.sample_rate
+
+    def to_pcm16(self) -> bytes:
+        return (np.clip(self.samples, -1.0, 1.0) * 32767).astype("<i2").tobytes()
+
+class PCMIngestor:
+    """Streaming PCM16 ingestion: resample, energy-based VAD and chunking into utterances.
+
+    Frames arrive as raw little-endian PCM16 (the browser worklet sends 4096 samples per
+    message). Each frame is viewed in place with np.frombuffer, low-passed below the target
+    Nyquist frequency when downsampling (anti-aliasing FIR via np.convolve), resampled by
+    vectorized linear interpolation (filter state and phase carried across frames), split
+    into VAD windows and grouped into utterances that end after `silence_ms` of quiet or at
+    `max_utterance_s`.
+    """
+
+    def __init__(self, input_rate: int = 48000, target_rate: int = 16000, window_ms: int = 20,
+                 threshold_db: float = -45.0, silence_ms: int = 500, prefix_ms: int = 300,
+                 min_speech_ms: int = 200, max_utterance_s: float = 15.0):
+        if not MIN_INPUT_RATE <= input_rate <= MAX_INPUT_RATE:
+            raise ValueError(f"input_rate must be between {MIN_INPUT_RATE} and {MAX_INPUT_RATE} Hz, got {input_rate}")
+        self.input_rate = input_rate
+        self.target_rate = target_rate
+        self.window = target_rate * window_ms // 1000
+        self.threshold_db = threshold_db
+        self.silence_windows = max(silence_ms // window_ms, 1)
+        self.prefix_windows = prefix_ms // window_ms
+        self.min_speech_windows = max(min_speech_ms // window_ms, 1)
+        self.max_windows = int(max_utterance_s * 1000 // window_ms)
+
+        self._step = input_rate / target_rate
+        # Anti-aliasing: without it everything above target_rate / 2 folds back into the speech band.
+        # Flat to 80% of the target Nyquist frequency (6.4 kHz at 16 kHz), 60 dB down from Nyquist on.
+        self._fir = (lowpass_taps(input_rate, 0.4 * target_rate, 0.1 * target_rate)
+                     if input_rate > target_rate else None)
+        self._fir_history = np.zeros(len(self._fir) - 1 if self._fir is not None else 0, dtype=np.float32)
+        self._position = 0.0                      # Next output position, in input samples
+        self._last_sample = np.zeros(1, dtype=np.float32)
+        self._odd_byte = b""                      # Half a sample split across frames
+        self._pending = np.zeros(0, dtype=np.float32)  # Resampled audio not yet in a full window
+
+        self._windows: List[np.ndarray] = []      # Current utterance (or pre-speech padding)
+        self._speech_windows = 0
+        self._silent_run = 0
+        self._in_speech = False
+        self._windows_seen = 0
+        self.frames = 0
+
+    def push(self, frame: Union[bytes, bytearray, memoryview]) -> List[Utterance]:
+        """Feed one binary frame; returns the utterances it completed"""
+        self.frames += 1
+        view = memoryview(frame)
+        if self._odd_byte:
+            view = memoryview(self._odd_byte + bytes(view))
+            self._odd_byte = b""
+        if len(view) % 2:
+            self._odd_byte = bytes(view[-1:])
+            view = view[:-1]
+        if not len(view):
+            return []
+
+        pcm = np.frombuffer(view, dtype="<i2")  # Zero-copy view over the frame
+        samples = pcm.astype(np.float32) * (1.0 / 32768.0)
+        resampled = self._resample(samples)
+
+        audio = np.concatenate((self._pending, resampled)) if len(self._pending) else resampled
+        usable = len(audio) - len(audio) % self.window
+        self._pending = audio[usable:]
+        if not usable:
+            return []
+        return self._detect(audio[:usable].reshape(-1, self.window))
+
+    def flush(self) -> List[Utterance]:
+        """End of stream: emit the utterance in progress, if any"""
+        if self._in_speech and self._speech_windows >= self.min_speech_windows:
+            return [self._emit()]
+        return []
+
+    def _resample(self, samples: np.ndarray) -> np.ndarray:
+        if self.input_rate == self.target_rate:
+            return samples
+        if self._fir is not None:
+            history = np.concatenate((self._fir_history, samples))
+            self._fir_history = history[len(history) - len(self._fir_history):]
+            samples = np.convolve(history, self._fir, mode="valid")  # One output per input sample
+        source = np.concatenate((self._last_sample, samples))
+        last_index = len(source) - 1
+        count = int((last_index - self._position) // self._step) + 1
+        if count <= 0:
+            self._position -= len(samples)
+            self._last_sample = source[-1:]
+            return np.zeros(0, dtype=np.float32)
+        positions = self._position + np.arange(count) * self._step
+        out = np.interp(positions, np.arange(len(source)), source).astype(np.float32)
+        # Carry the phase into the next frame (index 0 there is this frame's last sample)
+        self._position = positions[-1] + self._step - last_index
+        self._last_sample = source[-1:]
+        return out
+
+    def _detect(self, windows: np.ndarray) -> List[Utterance]:
+        energy = np.sqrt(np.mean(np.square(windows), axis=1))
+        speech = 20 * np.log10(energy + 1e-10) > self.threshold_db
+        utterances = []
+        for window, is_speech in zip(windows, speech):
+            self._windows_seen += 1
+            if not self._in_speech:
+                self._windows.append(window)
+                if is_speech:
+                    self._in_speech = True
+                    self._speech_windows = 1
+                    self._silent_run = 0
+                elif len(self._windows) > self.prefix_windows:
+                    self._windows.pop(0)
+                continue
+
+            self._windows.append(window)
+            if is_speech:
+                self._speech_windows += 1
+                self._silent_run = 0
+            else:
+                self._silent_run += 1
+
+            if self._silent_run >= self.silence_windows or len(self._windows) >= self.max_windows:
+                if self._speech_windows >= self.min_speech_windows:
+                    utterances.append(self._emit())
+                else:
+                    self._reset()  # Too short - a click or a cough
+        return utterances
+
+    def _emit(self) -> Utterance:
+        # Drop the trailing silence, keep the pre-speech padding
+        windows = self._windows[:len(self._windows) - self._silent_run] or self._windows
+        started_at = (self._windows_seen - len(self._windows)) * self.window / self.target_rate
+        utterance = Utterance(np.concatenate(windows), self.target_rate, started_at)
+        self._reset()
+        return utterance
+
+    def _reset(self):
+        self._windows = []
+        self._speech_windows = 0
+        self._silent_run = 0
+        self._in_speech = False
+
+def benchmark(seconds: float = 60.0, input_rate: int = 48000, frame_samples: int = 4096):
+    """Push synthetic speech/silence through one ingestor and report frames/s on one core"""
+    rng = np.random.default_rng(0)
+    frame_count = int(seconds * input_rate / frame_samples)
+    t = np.arange(frame_samples) / input_rate
+    frames = []
+    for i in range(frame_count):
+        # ~1.5 s of "speech" (tone + noise), then ~1 s of near-silence
+        speaking = (i * frame_samples / input_rate) % 2.5 < 1.5
+        amplitude = 0.3 if speaking else 0.001
+        signal = amplitude * (np.sin(2 * np.pi * 220 * t) + 0.3 * rng.standard_normal(frame_samples))
+        frames.append((np.clip(signal, -1, 1) * 32767).astype("<i2").tobytes())
+
+    ingestor = PCMIngestor(input_rate=input_rate)
+    utterances = 0
+    started = time.process_time()
+    for frame in frames:
+        utterances += len(ingestor.push(frame))
+    utterances += len(ingestor.flush())
+    elapsed = time.process_time() - started
+
+    audio_seconds = frame_count * frame_samples / input_rate
+    print(f"frames: {frame_count} x {frame_samples} samples @ {input_rate} Hz ({audio_seconds:.0f}s of audio)")
+    print(f"cpu time: {elapsed:.3f}s")
+    print(f"throughput: {frame_count / elapsed:,.0f} frames/s per core "
+          f"({audio_seconds / elapsed:,.0f}x realtime, ~{int(audio_seconds / elapsed)} concurrent streams)")
+    print(f"utterances detected: {utterances}")
+
+if __name__ == "__main__":
+    # python -m utils.audio_ingest [seconds_of_audio]
+    benchmark(float(sys.argv[1]) if len(sys.argv) > 1 else 60.0)
@@ -1,11 +1,51 @@
 import httpx
 from typing import List, Dict
-import json
+import asyncio
+import os
 
 class OpenAIClient:
-    def __init__(self, api_key: str):
+    def __init__(self, api_key: str, max_connections: int = None):
         self.api_key = api_key
         self.base_url = "https://api.openai.com/v1"
+        self.max_connections = max_connections or int(os.getenv("OPENAI_MAX_CONNECTIONS", "20"))
+        # Idle pooled connections are kept this long; long enough for pre-warmed ones to outlive startup
+        self.keepalive_expiry = float(os.getenv("OPENAI_KEEPALIVE_SECONDS", "120"))
+        self._http_client = None
+        self._http_pid = None
+    
+    def get_http_client(self) -> httpx.AsyncClient:
+        """Pooled client, created lazily in the process that uses it (never inherited across fork)"""
+        if self._http_client is None or self._http_pid != os.getpid():
+            self._http_client = httpx.AsyncClient(
+                timeout=30.0,
+                limits=httpx.Limits(
+                    max_connections=self.max_connections,
+                    max_keepalive_connections=self.max_connections,
+                    keepalive_expiry=self.keepalive_expiry
+                )
+            )
+            self._http_pid = os.getpid()
+        return self._http_client
+    
+    async def prewarm(self, connections: int = 2) -> str:
+        """Open pooled keep-alive connections (DNS + TLS) to the API before the first player needs them"""
+        client = self.get_http_client()
+        headers = {"Authorization": f"Bearer {self.api_key}"}
+        responses = await asyncio.gather(*[
+            client.get(f"{self.base_url}/models/gpt-4o-mini", headers=headers)
+            for _ in range(connections)
+        ])
+        return f"{connections} connections, status {responses[0].status_code}"
+    
+    def reset_after_fork(self):
+        """Drop any client inherited from the parent; the worker builds its own on first use"""
+        self._http_client = None
+        self._http_pid = None
+    
+    async def close(self):
+        if self._http_client is not None and self._http_pid == os.getpid():
+            await self._http_client.aclose()
+        self._http_client = None
     
     async def chat_completion(self, messages: List[Dict[str, str]], model: str = "gpt-4", **kwargs):
         headers = {
@@ -32,16 +72,15 @@ class OpenAIClient:
         if system_message:
             data["instructions"] = system_message
         
-        async with httpx.AsyncClient() as client:
-            response = await client.post(
-                f"{self.base_url}/responses",
-                headers=headers,
-                json=data,
-                timeout=30.0
-            )
-            
-            if response.status_code != 200:
-                raise Exception(f"OpenAI API error: {response.status_code} - {response.text}")
-            
-            result = response.json()
-            return result["output"][0]["content"][0]["text"]
\ No newline at end of file
+        response = await self.get_http_client().post(
+            f"{self.base_url}/responses",
+            headers=headers,
+            json=data,
+            timeout=30.0
+        )
+        
+        if response.status_code != 200:
+            raise Exception(f"OpenAI API error: {response.status_code} - {response.text}")
+        
+        result = response.json()
+        return result["output"][0]["content"][0]["text"]
\ No newline at end of file
@@ -0,0 +1,348 @@
+from typing import Dict, Any, List, Optional, Callable
+import asyncio
+import os
+import sys
+import threading
+import time
+import uuid
+from collections import Counter, OrderedDict, deque
+
+_CWD = os.getcwd()
+
+def _frame_label(code) -> str:
+    path = code.co_filename
+    if path.startswith(_CWD):
+        path = os.path.relpath(path, _CWD)
+    elif "site-packages" in path:
+        path = path.split("site-packages" + os.sep, 1)[-1]
+    else:
+        path = os.path.basename(path)
+    return f"{code.co_name} ({path}:{code.co_firstlineno})"
+
+def thread_stack(thread_id: int) -> List[Any]:
+    """Frames of another thread's current stack, outermost first"""
+    frame = sys._current_frames().get(thread_id)
+    frames = []
+    while frame is not None:
+        frames.append(frame)
+        frame = frame.f_back
+    frames.reverse()
+    return frames
+
+class Profile:
+    """Samples collected by one StackSampler run; `collapsed()` is flamegraph.pl / speedscope input"""
+
+    def __init__(self, label: str, interval_s: float):
+        self.profile_id = uuid.uuid4().hex[:12]
+        self.label = label
+        self.interval_s = interval_s
+        self.started_at = time.time()
+        self.duration_s = 0.0
+        self.stacks: Counter = Counter()
+
+    @property
+    def samples(self) -> int:
+        return sum(self.stacks.values())
+
+    def collapsed(self) -> str:
+        return "".join(f"{stack} {count}\n" for stack, count in self.stacks.most_common())
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            "profile_id": self.profile_id,
+            "label": self.label,
+            "started_at": self.started_at,
+            "duration_s": round(self.duration_s, 3),
+            "interval_ms": self.interval_s * 1000,
+            "samples": self.samples
+        }
+
+class StackSampler:
+    """Samples one thread's Python stack from a background thread.
+
+    Runs alongside the event loop (no tracing hooks), so overhead is one stack walk per
+    interval. While the loop is idle its samples end in the selector's poll call.
+    """
+
+    def __init__(self, thread_id: int, label: str, interval_s: float = 0.005, max_duration_s: float = 60.0,
+                 on_finish: Optional[Callable[[Profile], None]] = None):
+        self.thread_id = thread_id
+        self.max_duration_s = max_duration_s
+        self.on_finish = on_finish
+        self.profile = Profile(label, interval_s)
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name=f"profiler-{self.profile.profile_id}", daemon=True)
+
+    def start(self) -> "StackSampler":
+        self._thread.start()
+        return self
+
+    def stop(self) -> Profile:
+        self._stop.set()
+        self._thread.join()
+        return self.profile
+
+    @property
+    def running(self) -> bool:
+        return self._thread.is_alive()
+
+    def _run(self):
+        profile = self.profile
+        started = time.perf_counter()
+        while not self._stop.wait(profile.interval_s):
+            frames = thread_stack(self.thread_id)
+            if frames:
+                profile.stacks[";".join(_frame_label(frame.f_code) for frame in frames)] += 1
+            if time.perf_counter() - started > self.max_duration_s:
+                break
+        profile.duration_s = time.perf_counter() - started
+        if self.on_finish:
+            self.on_finish(profile)
+
+class Profiler:
+    """On-demand sampling of the event loop thread: one admin-started session at a time plus per-request profiles"""
+
+    def __init__(self, interval_ms: float = 5.0, max_duration_s: float = 60.0, keep: int = 20,
+                 max_request_profiles: int = 2):
+        self.interval_s = interval_ms / 1000
+        self.max_duration_s = max_duration_s
+        self.max_request_profiles = max_request_profiles
+        self.active: Optional[StackSampler] = None
+        self.request_profiles = 0
+        self._keep = keep
+        self._finished: "OrderedDict[str, Profile]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _store(self, profile: Profile):
+        with self._lock:
+            self._finished[profile.profile_id] = profile
+            while len(self._finished) > self._keep:
+                self._finished.popitem(last=False)
+
+    def sampler(self, label: str, interval_ms: Optional[float] = None,
+                duration_s: Optional[float] = None) -> StackSampler:
+        """A sampler for the calling (event loop) thread; its profile is kept once it finishes"""
+        interval_s = interval_ms / 1000 if interval_ms else self.interval_s
+        duration_s = min(duration_s or self.max_duration_s, self.max_duration_s)
+        return StackSampler(threading.get_ident(), label, interval_s, duration_s, on_finish=self._store)
+
+    def start(self, interval_ms: Optional[float] = None, duration_s: Optional[float] = None) -> Profile:
+        if self.active and self.active.running:
+            raise RuntimeError(f"Profile {self.active.profile.profile_id} is already running")
+        self.active = self.sampler("manual", interval_ms, duration_s).start()
+        return self.active.profile
+
+    def stop(self) -> Optional[Profile]:
+        sampler, self.active = self.active, None
+        return sampler.stop() if sampler else None
+
+    def get(self, profile_id: str) -> Optional[Profile]:
+        if self.active and self.active.profile.profile_id == profile_id:
+            return self.active.profile
+        return self._finished.get(profile_id)
+
+    def list(self) -> List[Dict[str, Any]]:
+        profiles = list(self._finished.values())
+        if self.active and self.active.running:
+            profiles.append(self.active.profile)
+        return [profile.summary() for profile in reversed(profiles)]
+
+class LoopMonitor:
+    """Continuous event-loop health: scheduling lag, stalls with the blocking stack, CPU per endpoint.
+
+    A loop task wakes every `interval_ms` and records how late it woke up. A watchdog thread
+    notices when that heartbeat stops for longer than `slow_ms` and captures the loop thread's
+    stack while it is still blocked, which names the synchronous code responsible.
+    """
+
+    def __init__(self, interval_ms: float = 100.0, slow_ms: float = 100.0, history: int = 600):
+        self.interval_s = interval_ms / 1000
+        self.slow_ms = slow_ms
+        self.lags: deque = deque(maxlen=history)   # Recent lag samples, ms
+        self.stalls: deque = deque(maxlen=50)      # Loop blocked longer than slow_ms
+        self.slow_steps: deque = deque(maxlen=50)  # Request task steps longer than slow_ms
+        self.endpoints: Dict[str, Dict[str, float]] = {}
+        self._heartbeat = time.perf_counter()
+        self._open_stall: Optional[Dict[str, Any]] = None
+        self._task: Optional[asyncio.Task] = None
+        self._watchdog: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self._loop_thread_id: Optional[int] = None
+
+    def start(self):
+        """Call from the running loop (lifespan): per-process, after fork"""
+        self._loop_thread_id = threading.get_ident()
+        self._heartbeat = time.perf_counter()
+        self._stop.clear()
+        self._task = asyncio.create_task(self._tick())
+        self._watchdog = threading.Thread(target=self._watch, name="loop-watchdog", daemon=True)
+        self._watchdog.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._task:
+            self._task.cancel()
+
+    async def _tick(self):
+        while True:
+            expected = time.perf_counter() + self.interval_s
+            await asyncio.sleep(self.interval_s)
+            now = time.perf_counter()
+            lag_ms = max(now - expected, 0.0) * 1000
+            self.lags.append(lag_ms)
+            self._heartbeat = now
+            stall, self._open_stall = self._open_stall, None
+            if stall:
+                stall["blocked_ms"] = round(lag_ms, 1)
+
+    def _watch(self):
+        while not self._stop.wait(self.interval_s / 2):
+            overdue_ms = (time.perf_counter() - self._heartbeat - self.interval_s) * 1000
+            if overdue_ms < self.slow_ms or self._open_stall:
+                continue
+            frames = thread_stack(self._loop_thread_id)
+            stall = {
+                "at": time.time(),
+                "blocked_ms": None,  # Filled in when the loop wakes up again
+                "stack": [f"{_frame_label(frame.f_code)} line {frame.f_lineno}" for frame in frames[-25:]]
+            }
+            self._open_stall = stall
+            self.stalls.append(stall)
+            print(f"WARNING: event loop blocked for {overdue_ms:.0f}ms+ in {stall['stack'][-1] if frames else '?'}")
+
+    def record_request(self, endpoint: str, cpu_ms: float, wall_ms: float, steps: int, max_step_ms: float):
+        stats = self.endpoints.get(endpoint)
+        if stats is None:
+            stats = self.endpoints[endpoint] = {"requests": 0, "cpu_ms": 0.0, "wall_ms": 0.0, "steps": 0,
+                                                "max_cpu_ms": 0.0, "max_step_ms": 0.0}
+        stats["requests"] += 1
+        stats["cpu_ms"] += cpu_ms
+        stats["wall_ms"] += wall_ms
+        stats["steps"] += steps
+        stats["max_cpu_ms"] = max(stats["max_cpu_ms"], cpu_ms)
+        stats["max_step_ms"] = max(stats["max_step_ms"], max_step_ms)
+        if max_step_ms >= self.slow_ms:
+            self.slow_steps.append({"at": time.time(), "endpoint": endpoint, "step_ms": round(max_step_ms, 1)})
+
+    def report(self) -> Dict[str, Any]:
+        lags = sorted(self.lags)
+        total_cpu = sum(stats["cpu_ms"] for stats in self.endpoints.values()) or 1.0
+        return {
+            "pid": os.getpid(),
+            "lag_ms": {
+                "samples": len(lags),
+                "last": round(self.lags[-1], 2) if lags else None,
+                "mean": round(sum(lags) / len(lags), 2) if lags else None,
+                "p99": round(lags[min(int(len(lags) * 0.99), len(lags) - 1)], 2) if lags else None,
+                "max": round(lags[-1], 2) if lags else None
+            },
+            "stalls": list(self.stalls),
+            "slow_steps": list(self.slow_steps),
+            "endpoints": {
+                endpoint: {
+                    **{key: round(value, 2) for key, value in stats.items()},
+                    "mean_cpu_ms": round(stats["cpu_ms"] / stats["requests"], 2),
+                    "cpu_share": round(stats["cpu_ms"] / total_cpu, 3)
+                }
+                for endpoint, stats in sorted(self.endpoints.items(), key=lambda item: -item[1]["cpu_ms"])
+            }
+        }
+
+class _TimedSteps:
+    """Awaits a coroutine while timing each step the event loop runs it for (CPU and wall time)"""
+
+    def __init__(self, coro):
+        self.coro = coro
+        self.cpu_s = 0.0
+        self.steps = 0
+        self.max_step_s = 0.0
+
+    def __await__(self):
+        inner = self.coro.__await__()
+        value, error = None, None
+        while True:
+            cpu, wall = time.thread_time(), time.perf_counter()
+            try:
+                yielded = inner.throw(error) if error is not None else inner.send(value)
+            except StopIteration as done:
+                return done.value
+            finally:
+                self.cpu_s += time.thread_time() - cpu
+                self.max_step_s = max(self.max_step_s, time.perf_counter() - wall)
+                self.steps += 1
+            value, error = None, None
+            try:
+                value = yield yielded
+            except GeneratorExit:
+                inner.close()
+                raise
+            except BaseException as e:
+                error = e
+
+class ProfilingMiddleware:
+    """ASGI middleware: per-endpoint CPU accounting and `X-Profile: 1` per-request sampling.
+
+    Per-request profiles sample the loop thread for the lifetime of the request, so work
+    from concurrent requests shows up too; the profile id is returned in `X-Profile-Id`
+    and the collapsed stacks are served by /admin/profile/{id}.
+    """
+
+    def __init__(self, app, profiler: Profiler, monitor: Optional[LoopMonitor] = None,
+                 is_admin: Callable[[Optional[str]], bool] = lambda token: False):
+        self.app = app
+        self.profiler = profiler
+        self.monitor = monitor
+        self.is_admin = is_admin
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] not in ("http", "websocket"):
+            return await self.app(scope, receive, send)
+
+        sampler = None
+        downstream_send = send
+        if scope["type"] == "http":
+            headers = dict(scope.get("headers") or [])
+            if (headers.get(b"x-profile") == b"1"
+                    and self.profiler.request_profiles < self.profiler.max_request_profiles
+                    and self.is_admin(headers.get(b"x-admin-token", b"").decode("latin-1") or None)):
+                sampler = self.profiler.sampler(f"{scope['method']} {scope['path']}")
+                profile_id = sampler.profile.profile_id.encode()
+
+                async def send_with_profile_id(message):
+                    if message["type"] == "http.response.start":
+                        message = {**message, "headers": [*message.get("headers", []), (b"x-profile-id", profile_id)]}
+                    await send(message)
+
+                downstream_send = send_with_profile_id
+                self.profiler.request_profiles += 1
+                sampler.start()
+
+        timed = _TimedSteps(self.app(scope, receive, downstream_send))
+        started = time.perf_counter()
+        try:
+            await timed
+        finally:
+            if sampler:
+                try:
+                    # Joining the sampler thread waits up to one interval: do it off the loop
+                    await asyncio.to_thread(sampler.stop)
+                finally:
+                    self.profiler.request_profiles -= 1
+            if self.monitor:
+                # The router stores the matched route in the scope: account by template, not raw path
+                route = scope.get("route")
+                endpoint = f"{scope.get('method', 'WS')} {getattr(route, 'path', None) or 'unmatched'}"
+                self.monitor.record_request(endpoint, timed.cpu_s * 1000, (time.perf_counter() - started) * 1000,
+                                            timed.steps, timed.max_step_s * 1000)
+
+def create_profiling():
+    """LOOP_MONITOR=true|false, LOOP_MONITOR_INTERVAL_MS, LOOP_SLOW_MS, PROFILE_INTERVAL_MS, PROFILE_MAX_SECONDS"""
+    profiler = Profiler(
+        interval_ms=float(os.getenv("PROFILE_INTERVAL_MS", "5")),
+        max_duration_s=float(os.getenv("PROFILE_MAX_SECONDS", "60"))
+    )
+    monitor = LoopMonitor(
+        interval_ms=float(os.getenv("LOOP_MONITOR_INTERVAL_MS", "100")),
+        slow_ms=float(os.getenv("LOOP_SLOW_MS", "100"))
+    ) if os.getenv("LOOP_MONITOR", "true").lower() == "true" else None
+    return profiler, monitor
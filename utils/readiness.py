@@ -0,0 +1,77 @@
+from typing import Dict, Any, Optional, Callable, Awaitable, Tuple
+import asyncio
+import os
+import time
+
+class Readiness:
+    """Per-process record of warm-up steps, reported by /ready"""
+
+    def __init__(self):
+        self.steps: Dict[str, Dict[str, Any]] = {}
+        self.started_at = time.time()
+        self._runs: Dict[str, Tuple[Callable[[], Awaitable[Any]], float, bool]] = {}  # For retries
+
+    def mark(self, step: str, duration_ms: float, ok: bool = True, detail: Optional[str] = None,
+             pid: Optional[int] = None, required: bool = True):
+        self.steps[step] = {
+            "ok": ok,
+            "required": required,
+            "duration_ms": round(duration_ms, 2),
+            "pid": pid or os.getpid(),
+            **({"detail": detail} if detail else {})
+        }
+
+    async def run_step(self, step: str, fn: Callable[[], Awaitable[Any]], timeout: float = 10.0,
+                       required: bool = True) -> bool:
+        """Time one warm-up step; failures are recorded instead of raised (required ones fail /ready)"""
+        self._runs[step] = (fn, timeout, required)
+        attempts = self.steps.get(step, {}).get("attempts", 0) + 1
+        started = time.perf_counter()
+        try:
+            detail = await asyncio.wait_for(fn(), timeout)
+            self.mark(step, (time.perf_counter() - started) * 1000,
+                      detail=str(detail) if detail is not None else None, required=required)
+            ok = True
+        except Exception as e:
+            self.mark(step, (time.perf_counter() - started) * 1000, ok=False,
+                      detail=f"{type(e).__name__}: {e}", required=required)
+            print(f"WARM-UP step {step} failed (attempt {attempts}): {e}")
+            ok = False
+        self.steps[step]["attempts"] = attempts
+        return ok
+
+    async def retry_failed(self, interval: float = 5.0, max_interval: float = 60.0):
+        """Re-run failed required steps with backoff until all pass, so a transient failure
+        at startup (e.g. a Redis blip) does not keep the worker out of rotation for good"""
+        delay = interval
+        while True:
+            failed = [step for step, info in self.steps.items()
+                      if info["required"] and not info["ok"] and step in self._runs]
+            if not failed:
+                return
+            await asyncio.sleep(delay)
+            for step in failed:
+                if await self.run_step(step, *self._runs[step]):
+                    print(f"WARM-UP step {step} recovered")
+            delay = min(delay * 2, max_interval)
+
+    def reset_after_fork(self):
+        """Keep steps inherited from the master (content), drop per-process ones"""
+        master_pid = os.getppid()
+        self.steps = {name: step for name, step in self.steps.items() if step["pid"] == master_pid}
+        self._runs = {}
+        self.started_at = time.time()
+
+    @property
+    def ready(self) -> bool:
+        return bool(self.steps) and all(step["ok"] for step in self.steps.values() if step["required"])
+
+    def report(self) -> Dict[str, Any]:
+        return {
+            "ready": self.ready,
+            "pid": os.getpid(),
+            "uptime_s": round(time.time() - self.started_at, 1),
+            "steps": self.steps
+        }
+
+readiness = Readiness()
@@ -3,9 +3,21 @@ import os
 
 _redis_client = None
 
+def create_redis_client(redis_url: str = None, max_connections: int = None,
+                        health_check_interval: int = None) -> redis.Redis:
+    """Build a Redis client with a tunable connection pool (REDIS_MAX_CONNECTIONS, REDIS_HEALTH_CHECK_INTERVAL)"""
+    pool = redis.ConnectionPool.from_url(
+        redis_url or os.getenv("REDIS_URL", "redis://localhost:6379"),
+        decode_responses=True,
+        max_connections=max_connections or int(os.getenv("REDIS_MAX_CONNECTIONS", "50")),
+        health_check_interval=health_check_interval if health_check_interval is not None
+        else int(os.getenv("REDIS_HEALTH_CHECK_INTERVAL", "30")),
+        socket_keepalive=True
+    )
+    return redis.Redis(connection_pool=pool)
+
 async def get_redis_client():
     global _redis_client
     if _redis_client is None:
-        redis_url = os.getenv("REDIS_URL", "redis://localhost:6379")
-        _redis_client = redis.from_url(redis_url, decode_responses=True)
-    return _redis_client
\ No newline at end of file
+        _redis_client = create_redis_client()
+    return _redis_client
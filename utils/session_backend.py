@@ -0,0 +1,208 @@
+from typing import Dict, List, Optional, AsyncIterator
+import os
+import time
+from utils.redis_client import create_redis_client
+
+# Set fields only if the session still exists (background writers must not resurrect offloaded sessions)
+_UPDATE_EXISTING = """
+if redis.call('EXISTS', KEYS[1]) == 1 then
+    redis.call('HSET', KEYS[1], unpack(ARGV))
+    return 1
+end
+return 0
+"""
+
+# Delete only if a field still holds the expected value (no write landed in between)
+_DELETE_IF_UNCHANGED = """
+if redis.call('HGET', KEYS[1], ARGV[1]) == ARGV[2] then
+    return redis.call('DEL', KEYS[1])
+end
+return 0
+"""
+
+class SessionBackend:
+    """Hot-tier session storage: one flat string hash per session id"""
+
+    name = "base"
+
+    async def get(self, session_id: str) -> Dict[str, str]:
+        """All fields of the session ({} if it does not exist)"""
+        raise NotImplementedError
+
+    async def get_fields(self, session_id: str, *fields: str) -> List[Optional[str]]:
+        raise NotImplementedError
+
+    async def set(self, session_id: str, fields: Dict[str, str], ttl: Optional[int] = None):
+        """Create or update fields, refreshing the TTL when given"""
+        raise NotImplementedError
+
+    async def update_existing(self, session_id: str, fields: Dict[str, str]) -> bool:
+        """Update fields only if the session exists; returns whether it did"""
+        raise NotImplementedError
+
+    async def delete(self, session_id: str):
+        raise NotImplementedError
+
+    async def delete_if_unchanged(self, session_id: str, field: str, expected: str) -> bool:
+        raise NotImplementedError
+
+    def scan_ids(self) -> AsyncIterator[str]:
+        """Iterate over the ids of all stored sessions"""
+        raise NotImplementedError
+
+    async def ping(self) -> bool:
+        raise NotImplementedError
+
+    def reset_after_fork(self):
+        """Drop connections inherited from a parent process"""
+        pass
+
+    async def close(self):
+        pass
+
+class MemorySessionBackend(SessionBackend):
+    """In-process engine for single-node development, tests and benchmarks"""
+
+    name = "memory"
+
+    def __init__(self):
+        self._sessions: Dict[str, Dict[str, str]] = {}
+        self._expires: Dict[str, float] = {}
+
+    def _live(self, session_id: str) -> Optional[Dict[str, str]]:
+        expires_at = self._expires.get(session_id)
+        if expires_at is not None and expires_at <= time.monotonic():
+            self._sessions.pop(session_id, None)
+            self._expires.pop(session_id, None)
+        return self._sessions.get(session_id)
+
+    async def get(self, session_id: str) -> Dict[str, str]:
+        return dict(self._live(session_id) or {})
+
+    async def get_fields(self, session_id: str, *fields: str) -> List[Optional[str]]:
+        session = self._live(session_id) or {}
+        return [session.get(field) for field in fields]
+
+    async def set(self, session_id: str, fields: Dict[str, str], ttl: Optional[int] = None):
+        session = self._live(session_id)
+        if session is None:
+            session = self._sessions[session_id] = {}
+        session.update({field: str(value) for field, value in fields.items()})
+        if ttl:
+            self._expires[session_id] = time.monotonic() + ttl
+
+    async def update_existing(self, session_id: str, fields: Dict[str, str]) -> bool:
+        session = self._live(session_id)
+        if session is None:
+            return False
+        session.update({field: str(value) for field, value in fields.items()})
+        return True
+
+    async def delete(self, session_id: str):
+        self._sessions.pop(session_id, None)
+        self._expires.pop(session_id, None)
+
+    async def delete_if_unchanged(self, session_id: str, field: str, expected: str) -> bool:
+        session = self._live(session_id)
+        if session is None or session.get(field) != expected:
+            return False
+        await self.delete(session_id)
+        return True
+
+    async def scan_ids(self) -> AsyncIterator[str]:
+        for session_id in list(self._sessions):
+            if self._live(session_id) is not None:
+                yield session_id
+
+    async def ping(self) -> bool:
+        return True
+
+class RedisSessionBackend(SessionBackend):
+    """Single Redis server, pooled connections with periodic health checks"""
+
+    name = "redis"
+    key_format = "session:{}"
+
+    def __init__(self, client):
+        self.client = client
+        self._update_existing = client.register_script(_UPDATE_EXISTING)
+        self._delete_if_unchanged = client.register_script(_DELETE_IF_UNCHANGED)
+
+    def key(self, session_id: str) -> str:
+        return self.key_format.format(session_id)
+
+    def session_id(self, key: str) -> str:
+        prefix, suffix = self.key("\0").split("\0")
+        return key[len(prefix):len(key) - len(suffix)]
+
+    async def get(self, session_id: str) -> Dict[str, str]:
+        return await self.client.hgetall(self.key(session_id))
+
+    async def get_fields(self, session_id: str, *fields: str) -> List[Optional[str]]:
+        return await self.client.hmget(self.key(session_id), *fields)
+
+    async def set(self, session_id: str, fields: Dict[str, str], ttl: Optional[int] = None):
+        key = self.key(session_id)
+        async with self.client.pipeline(transaction=False) as pipe:
+            pipe.hset(key, mapping=fields)
+            if ttl:
+                pipe.expire(key, ttl)
+            await pipe.execute()
+
+    async def update_existing(self, session_id: str, fields: Dict[str, str]) -> bool:
+        args = [item for pair in fields.items() for item in pair]
+        return bool(await self._update_existing(keys=[self.key(session_id)], args=args))
+
+    async def delete(self, session_id: str):
+        await self.client.delete(self.key(session_id))
+
+    async def delete_if_unchanged(self, session_id: str, field: str, expected: str) -> bool:
+        return bool(await self._delete_if_unchanged(keys=[self.key(session_id)], args=[field, expected]))
+
+    async def scan_ids(self) -> AsyncIterator[str]:
+        async for key in self.client.scan_iter(match=self.key("*"), count=500):
+            yield self.session_id(key)
+
+    async def ping(self) -> bool:
+        return await self.client.ping()
+
+    def reset_after_fork(self):
+        # Disconnect without closing sockets the parent may still be using
+        self.client.connection_pool.reset()
+
+    async def close(self):
+        await self.client.aclose()
+
+class RedisClusterSessionBackend(RedisSessionBackend):
+    """Redis Cluster engine: keys carry the session id as a hash tag, so sessions
+    are spread over the cluster's slots by session-id hash and each session's
+    hash (and its scripts) stays on a single shard."""
+
+    name = "cluster"
+    key_format = "session:{{{}}}"
+
+    def reset_after_fork(self):
+        # The cluster client opens its node connections on first command, which happens in the worker
+        pass
+
+    async def scan_ids(self) -> AsyncIterator[str]:
+        # RedisCluster.scan_iter walks every primary
+        async for key in self.client.scan_iter(match="session:*", count=500):
+            yield self.session_id(key)
+
+def create_session_backend(engine: str = None) -> SessionBackend:
+    """Pick the engine from SESSION_BACKEND: memory, redis (default) or cluster"""
+    engine = (engine or os.getenv("SESSION_BACKEND", "redis")).lower()
+    if engine == "memory":
+        return MemorySessionBackend()
+    if engine == "redis":
+        return RedisSessionBackend(create_redis_client())
+    if engine == "cluster":
+        from redis.asyncio.cluster import RedisCluster
+        client = RedisCluster.from_url(
+            os.getenv("REDIS_CLUSTER_URL", os.getenv("REDIS_URL", "redis://localhost:7000")),
+            decode_responses=True,
+            max_connections=int(os.getenv("REDIS_MAX_CONNECTIONS", "50"))
+        )
+        return RedisClusterSessionBackend(client)
+    raise ValueError(f"Unknown SESSION_BACKEND: {engine}")
@@ -0,0 +1,207 @@
+from typing import Dict, Any, List, Optional, Callable
+import asyncio
+import json
+import os
+import sqlite3
+import sys
+import threading
+import time
+import zlib
+from utils.session_backend import SessionBackend, create_session_backend
+
+class ColdSessionStore:
+    """SQLite file holding compacted (zlib-compressed JSON) snapshots of idle sessions"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+
+    def _connection(self) -> sqlite3.Connection:
+        if self._conn is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self._conn = sqlite3.connect(self.path, check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS sessions ("
+                "session_id TEXT PRIMARY KEY, data BLOB NOT NULL, offloaded_at REAL NOT NULL)"
+            )
+        return self._conn
+
+    @staticmethod
+    def compact(fields: Dict[str, str]) -> bytes:
+        return zlib.compress(json.dumps(fields, separators=(",", ":")).encode("utf-8"))
+
+    @staticmethod
+    def expand(blob: bytes) -> Dict[str, str]:
+        return json.loads(zlib.decompress(blob).decode("utf-8"))
+
+    def put(self, session_id: str, fields: Dict[str, str]):
+        with self._lock:
+            conn = self._connection()
+            conn.execute(
+                "INSERT OR REPLACE INTO sessions (session_id, data, offloaded_at) VALUES (?, ?, ?)",
+                (session_id, self.compact(fields), time.time())
+            )
+            conn.commit()
+
+    def get(self, session_id: str) -> Optional[Dict[str, str]]:
+        with self._lock:
+            row = self._connection().execute(
+                "SELECT data FROM sessions WHERE session_id = ?", (session_id,)
+            ).fetchone()
+        return self.expand(row[0]) if row else None
+
+    def delete(self, session_id: str):
+        with self._lock:
+            conn = self._connection()
+            conn.execute("DELETE FROM sessions WHERE session_id = ?", (session_id,))
+            conn.commit()
+
+    def purge_older_than(self, cutoff: float) -> int:
+        with self._lock:
+            conn = self._connection()
+            deleted = conn.execute("DELETE FROM sessions WHERE offloaded_at < ?", (cutoff,)).rowcount
+            conn.commit()
+        return deleted
+
+    def iter_all(self):
+        with self._lock:
+            rows = self._connection().execute("SELECT session_id, data FROM sessions").fetchall()
+        for session_id, blob in rows:
+            yield session_id, self.expand(blob)
+
+    def count(self) -> int:
+        with self._lock:
+            return self._connection().execute("SELECT COUNT(*) FROM sessions").fetchone()[0]
+
+class SessionStore:
+    """Tiered session storage: active sessions in the hot backend, idle ones offloaded to disk.
+
+    Every load and write stamps `last_active`; the offloader moves sessions idle longer than
+    `idle_seconds` into the cold store, and `load` transparently rehydrates them.
+    """
+
+    def __init__(self, backend: SessionBackend, cold_path: str, idle_seconds: int = 900,
+                 hot_ttl: int = 7200, cold_retention_days: int = 30):
+        self.backend = backend
+        self.cold = ColdSessionStore(cold_path)
+        self.idle_seconds = idle_seconds
+        self.hot_ttl = hot_ttl  # Sliding safety-net TTL in case the offloader is not running
+        self.cold_retention_days = cold_retention_days
+        self.stats = {"offloaded": 0, "rehydrated": 0, "purged": 0}
+        self.offload_listeners: List[Callable[[str], None]] = []  # Called with each offloaded session id
+
+    async def save(self, session_id: str, fields: Dict[str, str]):
+        await self.backend.set(session_id, {**fields, "last_active": str(time.time())}, ttl=self.hot_ttl)
+
+    async def load(self, session_id: str) -> Dict[str, str]:
+        """Return the session hash, rehydrating it from the cold tier if needed ({} if unknown).
+
+        Loading marks the session active: a turn is starting, and the offloader must not move
+        it to the cold tier while the turn waits on the model.
+        """
+        fields = await self.backend.get(session_id)
+        if fields:
+            last_active = str(time.time())
+            if await self.backend.update_existing(session_id, {"last_active": last_active}):
+                return {**fields, "last_active": last_active}
+            # Offloaded between the read and the touch: the cold copy holds the full session
+
+        fields = await asyncio.to_thread(self.cold.get, session_id)
+        if not fields:
+            return {}
+        await self.save(session_id, fields)
+        await asyncio.to_thread(self.cold.delete, session_id)
+        self.stats["rehydrated"] += 1
+        return fields
+
+    async def offload_idle(self) -> int:
+        """Move sessions idle past the threshold from the hot backend to the cold store"""
+        cutoff = time.time() - self.idle_seconds
+        offloaded = 0
+        async for session_id in self.backend.scan_ids():
+            last_active, = await self.backend.get_fields(session_id, "last_active")
+            if last_active and float(last_active) > cutoff:
+                continue
+            fields = await self.backend.get(session_id)
+            if not fields:
+                continue
+            await asyncio.to_thread(self.cold.put, session_id, fields)
+            if not await self.backend.delete_if_unchanged(session_id, "last_active", fields.get("last_active", "")):
+                # Roll the snapshot back only if a turn landed while we were writing it. If the hot
+                # key is gone, another worker's offloader moved it first and the cold copy must stay.
+                current, = await self.backend.get_fields(session_id, "last_active")
+                if current is not None and current != fields.get("last_active"):
+                    await asyncio.to_thread(self.cold.delete, session_id)
+                continue
+            offloaded += 1
+            for listener in self.offload_listeners:
+                listener(session_id)
+        self.stats["offloaded"] += offloaded
+        return offloaded
+
+    async def purge_expired(self) -> int:
+        cutoff = time.time() - self.cold_retention_days * 86400
+        purged = await asyncio.to_thread(self.cold.purge_older_than, cutoff)
+        self.stats["purged"] += purged
+        return purged
+
+    async def run_offloader(self, interval_seconds: int = 60):
+        """Background loop started with the app"""
+        while True:
+            await asyncio.sleep(interval_seconds)
+            try:
+                await self.offload_idle()
+                await self.purge_expired()
+            except Exception as e:
+                print(f"ERROR offloading idle sessions: {e}")
+
+    async def export_snapshots(self, path: str) -> int:
+        """Write every session (hot and cold) to a JSONL file"""
+        exported = 0
+        with open(path, "w", encoding="utf-8") as f:
+            async for session_id in self.backend.scan_ids():
+                fields = await self.backend.get(session_id)
+                if fields:
+                    f.write(json.dumps({"session_id": session_id, "fields": fields}) + "\n")
+                    exported += 1
+            for session_id, fields in await asyncio.to_thread(lambda: list(self.cold.iter_all())):
+                f.write(json.dumps({"session_id": session_id, "fields": fields}) + "\n")
+                exported += 1
+        return exported
+
+    async def import_snapshots(self, path: str) -> int:
+        """Load snapshots into the cold tier; they are rehydrated on first access"""
+        imported = 0
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                snapshot = json.loads(line)
+                await asyncio.to_thread(self.cold.put, snapshot["session_id"], snapshot["fields"])
+                imported += 1
+        return imported
+
+def create_session_store(backend: SessionBackend = None) -> SessionStore:
+    return SessionStore(
+        backend or create_session_backend(),
+        cold_path=os.getenv("SESSION_COLD_PATH", "data/sessions.db"),
+        idle_seconds=int(os.getenv("SESSION_IDLE_SECONDS", "900")),
+        hot_ttl=int(os.getenv("SESSION_HOT_TTL", "7200")),
+        cold_retention_days=int(os.getenv("SESSION_COLD_RETENTION_DAYS", "30"))
+    )
+
+if __name__ == "__main__":
+    # python -m utils.session_store export|import <file.jsonl>
+    from dotenv import load_dotenv
+    load_dotenv()
+    if len(sys.argv) != 3 or sys.argv[1] not in ("export", "import"):
+        print("Usage: python -m utils.session_store export|import <file.jsonl>")
+        sys.exit(1)
+    store = create_session_store()
+    action = store.export_snapshots if sys.argv[1] == "export" else store.import_snapshots
+    count = asyncio.run(action(sys.argv[2]))
+    print(f"{sys.argv[1]}ed {count} sessions")
@@ -0,0 +1,61 @@
+import io
+import os
+import wave
+from utils.openai_client import OpenAIClient
+
+def pcm16_to_wav(pcm16: bytes, sample_rate: int) -> bytes:
+    buffer = io.BytesIO()
+    with wave.open(buffer, "wb") as wav:
+        wav.setnchannels(1)
+        wav.setsampwidth(2)
+        wav.setframerate(sample_rate)
+        wav.writeframes(pcm16)
+    return buffer.getvalue()
+
+class TranscriptionBackend:
+    """Turns one utterance of mono PCM16 audio into text"""
+
+    name = "base"
+
+    async def transcribe(self, pcm16: bytes, sample_rate: int) -> str:
+        raise NotImplementedError
+
+class OpenAITranscriptionBackend(TranscriptionBackend):
+    name = "openai"
+
+    def __init__(self, openai_client: OpenAIClient, model: str = "gpt-4o-mini-transcribe",
+                 language: str = "en"):
+        self.openai_client = openai_client
+        self.model = model
+        self.language = language
+
+    async def transcribe(self, pcm16: bytes, sample_rate: int) -> str:
+        response = await self.openai_client.get_http_client().post(
+            f"{self.openai_client.base_url}/audio/transcriptions",
+            headers={"Authorization": f"Bearer {self.openai_client.api_key}"},
+            data={"model": self.model, "language": self.language, "response_format": "json"},
+            files={"file": ("utterance.wav", pcm16_to_wav(pcm16, sample_rate), "audio/wav")},
+            timeout=30.0
+        )
+        if response.status_code != 200:
+            raise Exception(f"OpenAI transcription error: {response.status_code} - {response.text}")
+        return response.json().get("text", "")
+
+class StubTranscriptionBackend(TranscriptionBackend):
+    """Offline stand-in for development, tests and benchmarks: describes the audio instead of transcribing it"""
+
+    name = "stub"
+
+    async def transcribe(self, pcm16: bytes, sample_rate: int) -> str:
+        return f"[speech {len(pcm16) / 2 / sample_rate:.2f}s]"
+
+def create_transcription_backend(openai_client: OpenAIClient) -> TranscriptionBackend:
+    """TRANSCRIPTION_BACKEND=openai|stub (defaults to openai when an API key is configured)"""
+    backend = os.getenv("TRANSCRIPTION_BACKEND") or ("openai" if openai_client.api_key else "stub")
+    if backend == "openai":
+        return OpenAITranscriptionBackend(
+            openai_client, model=os.getenv("TRANSCRIPTION_MODEL", "gpt-4o-mini-transcribe")
+        )
+    if backend == "stub":
+        return StubTranscriptionBackend()
+    raise ValueError(f"Unknown TRANSCRIPTION_BACKEND: {backend}")
@@ -0,0 +1,81 @@
+import io
+import os
+import wave
+import zlib
+import numpy as np
+from utils.openai_client import OpenAIClient
+
+class TTSProvider:
+    """Turns a line of text into encoded audio"""
+
+    name = "base"
+    extension = "bin"
+    media_type = "application/octet-stream"
+
+    async def synthesize(self, text: str, voice: str, instructions: str) -> bytes:
+        raise NotImplementedError
+
+class OpenAITTSProvider(TTSProvider):
+    """OpenAI speech endpoint, Opus-encoded (compact, streams well in browsers)"""
+
+    name = "openai"
+    extension = "ogg"
+    media_type = "audio/ogg"
+
+    def __init__(self, openai_client: OpenAIClient, model: str = "gpt-4o-mini-tts"):
+        self.openai_client = openai_client
+        self.model = model
+
+    async def synthesize(self, text: str, voice: str, instructions: str) -> bytes:
+        response = await self.openai_client.get_http_client().post(
+            f"{self.openai_client.base_url}/audio/speech",
+            headers={
+                "Authorization": f"Bearer {self.openai_client.api_key}",
+                "Content-Type": "application/json"
+            },
+            json={
+                "model": self.model,
+                "voice": voice,
+                "input": text,
+                "instructions": instructions,
+                "response_format": "opus"
+            },
+            timeout=60.0
+        )
+        if response.status_code != 200:
+            raise Exception(f"OpenAI TTS error: {response.status_code} - {response.text}")
+        return response.content
+
+class LocalTTSProvider(TTSProvider):
+    """Offline stand-in for development and tests: a short deterministic tone, no network"""
+
+    name = "local"
+    extension = "wav"
+    media_type = "audio/wav"
+
+    def __init__(self, sample_rate: int = 16000):
+        self.sample_rate = sample_rate
+
+    async def synthesize(self, text: str, voice: str, instructions: str) -> bytes:
+        # ~60 ms per word, pitch derived from the cache key inputs so clips differ
+        seconds = min(max(len(text.split()) * 0.06, 0.2), 5.0)
+        frequency = 220 + zlib.crc32(f"{voice}|{instructions}".encode("utf-8")) % 440
+        frames = int(self.sample_rate * seconds)
+        # Vectorized: a per-sample Python loop here would stall the event loop for every clip
+        samples = (8000 * np.sin(2 * np.pi * frequency * np.arange(frames) / self.sample_rate)).astype("<i2").tobytes()
+        buffer = io.BytesIO()
+        with wave.open(buffer, "wb") as wav:
+            wav.setnchannels(1)
+            wav.setsampwidth(2)
+            wav.setframerate(self.sample_rate)
+            wav.writeframes(samples)
+        return buffer.getvalue()
+
+def create_tts_provider(openai_client: OpenAIClient) -> TTSProvider:
+    """TTS_PROVIDER=openai|local (defaults to openai when an API key is configured)"""
+    provider = os.getenv("TTS_PROVIDER") or ("openai" if openai_client.api_key else "local")
+    if provider == "openai":
+        return OpenAITTSProvider(openai_client, model=os.getenv("TTS_MODEL", "gpt-4o-mini-tts"))
+    if provider == "local":
+        return LocalTTSProvider()
+    raise ValueError(f"Unknown TTS_PROVIDER: {provider}")